@@ -0,0 +1,88 @@
+import os
+import asyncio
+import logging
+import threading
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError:  # only needed for ENGINE=async
+    httpx = None
+
+# runtime knobs
+PER_HOST_CONCURRENCY = int(os.getenv("PER_HOST_CONCURRENCY", "20"))
+# Optional overrides, e.g. "api-v1.zealy.io=32,api.telegram.org=4"
+HOST_CONCURRENCY = os.getenv("HOST_CONCURRENCY", "")
+ASYNC_MAX_CONNECTIONS = int(os.getenv("ASYNC_MAX_CONNECTIONS", "100"))
+# Multiplex requests to each host over HTTP/2 (pip install "httpx[http2]")
+HTTP2 = os.getenv("HTTP2", "0") == "1"
+
+
+def parse_host_limits(spec):
+    """Parse "host=N,host2=M" into a dict."""
+    limits = {}
+    for part in spec.split(","):
+        host, _, value = part.strip().partition("=")
+        if host and value.strip().isdigit():
+            limits[host.strip()] = int(value)
+    return limits
+
+
+class HostLimiter:
+    """Explicit per-host concurrency limits, asyncio semaphores by default.
+
+    Every request goes through the semaphore of its target host, so a burst of
+    claims or detail fetches can't put more than the configured number of
+    requests in flight against one API, however many accounts are running.
+    """
+
+    def __init__(self, default_limit=PER_HOST_CONCURRENCY, overrides=None, semaphore_factory=asyncio.Semaphore):
+        self.default_limit = default_limit
+        self.overrides = overrides if overrides is not None else parse_host_limits(HOST_CONCURRENCY)
+        # threading.BoundedSemaphore gives the same limits to worker threads
+        self.semaphore_factory = semaphore_factory
+        self._semaphores = {}
+        self._lock = threading.Lock()
+
+    def for_url(self, url):
+        host = urlsplit(url).hostname or ""
+        sem = self._semaphores.get(host)
+        if sem is None:
+            with self._lock:
+                sem = self._semaphores.get(host)
+                if sem is None:
+                    sem = self.semaphore_factory(self.overrides.get(host, self.default_limit))
+                    self._semaphores[host] = sem
+        return sem
+
+
+def make_async_client():
+    """Return an httpx.AsyncClient with a pool sized for the whole process."""
+    if httpx is None:
+        raise RuntimeError("ENGINE=async needs httpx: pip install httpx")
+    limits = httpx.Limits(max_connections=ASYNC_MAX_CONNECTIONS, max_keepalive_connections=ASYNC_MAX_CONNECTIONS)
+    http2 = HTTP2
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logging.warning('HTTP2=1 needs httpx with HTTP/2 support (pip install "httpx[http2]"), using HTTP/1.1')
+            http2 = False
+    return httpx.AsyncClient(limits=limits, timeout=10, http2=http2)
+
+
+async def warm_up(client, url, connections=1):
+    """Open ``connections`` keep-alive connections to url's host before the first poll."""
+    async def touch():
+        try:
+            await client.head(url, timeout=5)
+        except httpx.HTTPError as e:
+            logging.debug("Warm-up of %s failed: %s", url, e)
+
+    await asyncio.gather(*(touch() for _ in range(max(0, connections))))
+
+
+async def request(client, limiter, method, url, **kwargs):
+    """Send one request through the per-host limiter."""
+    async with limiter.for_url(url):
+        return await client.request(method, url, **kwargs)
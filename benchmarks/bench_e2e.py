@@ -0,0 +1,277 @@
+"""End-to-end benchmark: the real monitor loop against benchmarks.mock_zealy.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_e2e --accounts 4 --communities 2 --drops 20
+    python -m benchmarks.bench_e2e --latency-ms 50 --error-rate 0.05 --engine async
+
+Each drop clones one of the repo fixtures (tweetReact, Instagram, Reddit,
+X url) with fresh ids and links, uploads the matching link mapping for
+every account through the Flask routes (hitting the mock /files), then
+puts the quest on a board. Every account is expected to claim it.
+
+Reported: drop-to-claim latency seen by the mock, the bot's own
+detection-to-claim stages, mock requests per second, bot CPU per
+questboard poll (mock handler CPU excluded) and peak RSS.
+
+Runtime knobs (POLL_INTERVAL etc.) are taken from the environment; the
+benchmark only sets the ones that point the bot at the mock and lifts the
+Telegram and per-community request limits unless they are already set.
+"""
+import io
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import resource
+import tempfile
+import threading
+
+from benchmarks.fixtures import REPO_DIR, load_fixtures
+from benchmarks.mock_zealy import MockZealy
+
+# the benchmark chdirs into a scratch directory; keep the repo importable
+sys.path.insert(0, REPO_DIR)
+
+from latency import percentile  # noqa: E402
+from quest_features import extract_features  # noqa: E402
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=2)
+    parser.add_argument("--communities", type=int, default=1)
+    parser.add_argument("--boxes", type=int, default=3, help="boxes per board")
+    parser.add_argument("--filler", type=int, default=30, help="unclaimable quests per board")
+    parser.add_argument("--drops", type=int, default=12, help="claimable quests dropped during the run")
+    parser.add_argument("--drop-interval", type=float, default=0.5, help="seconds between drops")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="latency added to every mock response")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of --error-routes requests answered with 500")
+    parser.add_argument("--error-routes", default="questboard,detail", help="mock routes that fail at --error-rate (questboard, detail, claim)")
+    parser.add_argument("--poll-interval", type=float, default=None, help="overrides POLL_INTERVAL")
+    parser.add_argument("--engine", choices=("threads", "async"), default=None, help="overrides ENGINE")
+    parser.add_argument("--settle", type=float, default=15.0, help="max seconds to wait for outstanding claims")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    return parser.parse_args(argv)
+
+
+def configure_env(args, base_url, state_dir):
+    """Point the bot at the mock. Must run before main is imported."""
+    slugs = [f"bench{c}" for c in range(args.communities)]
+    os.environ.update({
+        "ZEALY_API": base_url,
+        "TELEGRAM_API_URL": base_url,
+        "TELEGRAM_BOT_TOKEN": "bench",
+        "TELEGRAM_CHAT_ID": "1",
+        "STATE_DB": os.path.join(state_dir, "state.db"),
+        "COMMUNITIES": ",".join(slugs),
+    })
+    for i in range(1, args.accounts + 1):
+        os.environ[f"ACCOUNT_{i}_NAME"] = f"bench_{i}"
+        os.environ[f"ACCOUNT_{i}_COOKIE"] = f"session=bench_{i}"
+    for i in range(args.accounts + 1, 21):
+        os.environ.pop(f"ACCOUNT_{i}_NAME", None)
+        os.environ.pop(f"ACCOUNT_{i}_COOKIE", None)
+    if args.poll_interval is not None:
+        os.environ["POLL_INTERVAL"] = str(args.poll_interval)
+    if args.engine is not None:
+        os.environ["ENGINE"] = args.engine
+    for key, value in (("TELEGRAM_MIN_INTERVAL", "0"), ("TELEGRAM_PER_MINUTE", "0"), ("COMMUNITY_REQUESTS_PER_MINUTE", "0")):
+        os.environ.setdefault(key, value)
+    return slugs
+
+
+def make_drop(fixture_name, fixture, n):
+    """Clone a fixture with fresh ids and a unique link; returns (quest, upload) where upload is (route, form) or None."""
+    text = json.dumps(fixture)
+    upload = None
+    if fixture_name == "instagram_task.json":
+        old = "https://www.instagram.com/reef.io/p/DNAGca9iSAr/"
+        new = f"{old}?bench={n}"
+        upload = ("/upload", {"link": new, "image1": b"\x89PNG" * 256, "image2": b"\x89PNG" * 256})
+    elif fixture_name == "reddit.json":
+        old = "https://www.reddit.com/r/ReefDeFi/comments/1n5syfe/"
+        new = f"https://www.reddit.com/r/ReefDeFi/comments/bench{n}/"
+    elif fixture_name == "tweeturl.json":
+        old = "https://x.com/reef_chain/status/1962547436305404213"
+        new = f"https://x.com/reef_chain/status/{1962547436305404213 + n}"
+        upload = ("/upload_x", {"x_link": new, "comment_url": f"https://x.com/bench/status/{n}"})
+    else:
+        old = new = None
+    if old:
+        text = text.replace(old, new)
+    quest = json.loads(text)
+    quest["id"] = str(uuid.uuid4())
+    quest["name"] = f"{quest.get('name', 'quest')} #{n}"
+    for task in quest.get("tasks", []):
+        task["id"] = str(uuid.uuid4())
+    quest.update(locked=False, claimed=False, completed=False, inReview=False, retryAfter=None)
+    if fixture_name == "reddit.json":
+        # the full share link (with its query string) is what the matcher sees
+        upload = ("/upload_reddit", {"link": extract_features(quest).reddit_links[0], "image": b"\x89PNG" * 256})
+    return quest, upload
+
+
+def upload_for(client, account_name, upload):
+    """Post a mapping through the Flask route and wait for its upload job, if any, to finish."""
+    route, form = upload
+    data = {"account_name": account_name}
+    for key, value in form.items():
+        data[key] = (io.BytesIO(value), f"{key}.png") if isinstance(value, bytes) else value
+    response = client.post(route, data=data, content_type="multipart/form-data")
+    if response.status_code not in (200, 202) or b"Failed" in response.data or b"not found" in response.data:
+        raise RuntimeError(f"upload {route} failed for {account_name}: {response.data[:200]!r}")
+    if response.status_code == 202:
+        status_url = json.loads(response.data)["status_url"]
+        while True:
+            job = json.loads(client.get(status_url).data)
+            if job["finished_at"] is not None:
+                break
+            time.sleep(0.01)
+        if job["state"] != "done":
+            raise RuntimeError(f"upload {route} failed for {account_name}: {job}")
+
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    state_dir = tempfile.mkdtemp(prefix="zealy-bench-")
+    mock = MockZealy(
+        [f"bench{c}" for c in range(args.communities)],
+        boxes=args.boxes,
+        filler_quests=args.filler,
+        latency=args.latency_ms / 1000,
+        error_rate=args.error_rate,
+        error_routes=args.error_routes.split(","),
+        seed=args.seed,
+    )
+    base_url = mock.start()
+    slugs = configure_env(args, base_url, state_dir)
+    # uploads/ and other relative paths land in the scratch directory
+    os.chdir(state_dir)
+
+    import main as bot  # reads the environment set above
+
+    accounts = bot.parse_accounts_env()
+    if bot.ENGINE == "async":
+        threading.Thread(target=lambda: asyncio.run(bot.run_async_engine(accounts)), name="engine", daemon=True).start()
+    else:
+        for account in accounts:
+            threading.Thread(target=bot.monitor_account, args=(account,), daemon=True).start()
+    client = bot.app.test_client()
+    while len(bot.sessions) < len(accounts):
+        time.sleep(0.05)
+    # let every feed get through its first (filler-only) poll
+    time.sleep(bot.POLL_INTERVAL * 2 + 0.5)
+
+    fixtures = list(load_fixtures().items())
+    expected = {}
+    started = time.monotonic()
+    cpu_started = cpu_seconds()
+    mock_cpu_started = mock.handler_cpu
+    polls_started = sum(feed.fetch_count for feed in bot.feeds.values())
+    requests_started = sum(mock.requests.values())
+    for n in range(args.drops):
+        fixture_name, fixture = fixtures[n % len(fixtures)]
+        quest, upload = make_drop(fixture_name, fixture, n)
+        if upload is not None:
+            for account in accounts:
+                upload_for(client, account["name"], upload)
+        mock.drop(slugs[n % len(slugs)], quest)
+        expected[quest["id"]] = fixture_name
+        time.sleep(args.drop_interval)
+
+    want = len(expected) * len(accounts)
+    deadline = time.monotonic() + args.settle
+    while time.monotonic() < deadline:
+        with mock._lock:
+            claimed = sum(1 for quest_id, _, _ in mock.claims if quest_id in expected)
+        if claimed >= want:
+            break
+        time.sleep(0.05)
+    elapsed = time.monotonic() - started
+
+    report = build_report(args, bot, mock, expected, accounts, elapsed,
+                          cpu_seconds() - cpu_started, mock.handler_cpu - mock_cpu_started,
+                          sum(feed.fetch_count for feed in bot.feeds.values()) - polls_started,
+                          sum(mock.requests.values()) - requests_started)
+    print_report(report, as_json=args.json)
+    sys.stdout.flush()
+    # monitor threads never return; don't wait for them
+    os._exit(0 if report["claims"]["missing"] == 0 else 1)
+
+
+def build_report(args, bot, mock, expected, accounts, elapsed, cpu, mock_cpu, polls, requests):
+    latencies = []
+    by_kind = {}
+    seen = set()
+    with mock._lock:
+        claims = list(mock.claims)
+        routes = dict(mock.requests)
+    for quest_id, cookie, claimed_at in claims:
+        if quest_id not in expected or (quest_id, cookie) in seen:
+            continue
+        seen.add((quest_id, cookie))
+        ms = (claimed_at - mock.dropped_at[quest_id]) * 1000
+        latencies.append(ms)
+        by_kind.setdefault(expected[quest_id], []).append(ms)
+
+    def describe(values):
+        values = sorted(values)
+        return {"count": len(values), "p50": percentile(values, 0.5), "p90": percentile(values, 0.9),
+                "p99": percentile(values, 0.99), "max": values[-1] if values else 0.0}
+
+    bot_cpu = max(0.0, cpu - mock_cpu)
+    return {
+        "config": {key: getattr(args, key) for key in ("accounts", "communities", "boxes", "filler", "drops",
+                                                       "latency_ms", "error_rate", "error_routes")} |
+                  {"engine": bot.ENGINE, "poll_interval": bot.POLL_INTERVAL},
+        "claims": {"expected": len(expected) * len(accounts), "made": len(seen),
+                   "missing": len(expected) * len(accounts) - len(seen)},
+        "drop_to_claim_ms": describe(latencies),
+        "drop_to_claim_ms_by_fixture": {name: describe(values) for name, values in sorted(by_kind.items())},
+        "bot_claim_stages_ms": {stage: values for stage, values in bot.claim_latency.summary().items() if stage != "by_kind"},
+        "elapsed_s": elapsed,
+        "requests": routes,
+        "requests_per_s": requests / elapsed if elapsed else 0.0,
+        "polls": polls,
+        "cpu_s": bot_cpu,
+        "cpu_ms_per_poll": bot_cpu * 1000 / polls if polls else 0.0,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+
+
+def print_report(report, as_json=False):
+    if as_json:
+        print(json.dumps(report, indent=2))
+        return
+    config = report["config"]
+    print("config: " + ", ".join(f"{key}={value}" for key, value in config.items()))
+    claims = report["claims"]
+    print(f"claims: {claims['made']}/{claims['expected']} ({claims['missing']} missing)")
+
+    def row(label, stats):
+        print(f"  {label:<24}{stats['count']:>6}{stats['p50']:>10.1f}{stats['p90']:>10.1f}{stats['p99']:>10.1f}{stats['max']:>10.1f}")
+
+    print(f"  {'latency (ms)':<24}{'n':>6}{'p50':>10}{'p90':>10}{'p99':>10}{'max':>10}")
+    row("drop -> claim", report["drop_to_claim_ms"])
+    for name, stats in report["drop_to_claim_ms_by_fixture"].items():
+        row(f"  {name}", stats)
+    for stage, stats in report["bot_claim_stages_ms"].items():
+        row(f"bot {stage}", stats)
+    print(f"requests: {report['requests_per_s']:.1f}/s over {report['elapsed_s']:.1f}s "
+          + ", ".join(f"{route}={count}" for route, count in sorted(report["requests"].items())))
+    print(f"cpu: {report['cpu_ms_per_poll']:.2f} ms per poll ({report['polls']} polls, {report['cpu_s']:.2f}s bot cpu)")
+    print(f"peak rss: {report['peak_rss_mb']:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
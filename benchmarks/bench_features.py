@@ -0,0 +1,35 @@
+"""Benchmark the single-pass quest feature extractor on the repo fixtures.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_features [iterations]
+"""
+import sys
+import time
+
+from benchmarks.fixtures import load_fixtures
+from quest_features import FeatureCache, extract_features
+
+
+def bench(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    cache = FeatureCache()
+    print(f"{'fixture':<22}{'extract (us)':>14}{'memoized (us)':>15}  features")
+    for name, quest_data in load_fixtures().items():
+        cold = bench(lambda: extract_features(quest_data), iterations)
+        cache.get(quest_data)
+        warm = bench(lambda: cache.get(quest_data), iterations)
+        features = extract_features(quest_data)
+        flags = [flag for flag in ("is_instagram", "is_reddit", "is_x_url") if getattr(features, flag)]
+        print(f"{name:<22}{cold:>14.2f}{warm:>15.2f}  {','.join(flags) or '-'} types={list(features.task_types)}")
+
+
+if __name__ == "__main__":
+    main()
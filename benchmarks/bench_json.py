@@ -0,0 +1,45 @@
+"""Benchmark quest detail decoding with every available JSON backend.
+
+Run from the repo root:
+
+    python -m benchmarks.bench_json [iterations]
+
+Backends that aren't installed are skipped. "slim" decodes only the
+QUEST_FIELDS the matchers use (straight into a struct with msgspec).
+"""
+import sys
+import json
+import time
+
+import fast_json
+from benchmarks.fixtures import load_fixtures
+
+
+def bench(fn, iterations):
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def decoders():
+    yield "json", json.loads
+    if fast_json.orjson is not None:
+        yield "orjson", fast_json.orjson.loads
+    if fast_json.msgspec is not None:
+        yield "msgspec", fast_json.msgspec.json.decode
+    yield f"slim ({'msgspec' if fast_json.msgspec else fast_json.BACKEND})", fast_json._decode_slim_quest
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    bodies = {name: json.dumps(quest).encode("utf-8") for name, quest in load_fixtures().items()}
+    names = [name for name, _ in decoders()]
+    print(f"{'fixture':<22}{'bytes':>7}" + "".join(f"{name:>18}" for name in names) + "   (us per decode)")
+    for fixture, body in bodies.items():
+        timings = [bench(lambda: decode(body), iterations) for _, decode in decoders()]
+        print(f"{fixture:<22}{len(body):>7}" + "".join(f"{t:>18.2f}" for t in timings))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import os
+import re
+import json
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Quest detail samples captured from the API
+FIXTURES = ("tweetReact.json", "instagram_task.json", "reddit.json", "tweeturl.json")
+
+# Some captures carry hand-written notes after a value, e.g. `"id": "…", - this is the quest id`
+_NOTE_RE = re.compile(r'",\s*-[^\n]*')
+
+
+def load_fixture(name):
+    """Load a quest detail fixture from the repo root, ignoring inline notes."""
+    with open(os.path.join(REPO_DIR, name)) as f:
+        text = f.read()
+    return json.loads(_NOTE_RE.sub('",', text))
+
+
+def load_fixtures():
+    """Return {fixture name: quest detail} for every repo fixture."""
+    return {name: load_fixture(name) for name in FIXTURES}
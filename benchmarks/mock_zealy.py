@@ -0,0 +1,174 @@
+"""In-process mock of the Zealy API (plus a Telegram stand-in) for benchmarks.
+
+Serves the endpoints the bot uses:
+
+    GET  /communities/<slug>/questboard/v2
+    GET  /communities/<slug>/quests/v2/<quest_id>
+    POST /communities/<slug>/quests/v2/<quest_id>/claim
+    POST /files
+    POST /bot<token>/sendMessage          (Telegram)
+    HEAD /<anything>                      (connection warm-up)
+
+Boards start with filler quests nobody can claim; ``drop`` puts a new quest
+on a board and remembers when, so every claim that arrives can be timed
+from the moment the quest became visible. Latency is added to every
+request; injected 500s only hit ``error_routes`` (polling by default, so
+uploads and claims made by the benchmark itself stay deterministic).
+"""
+import re
+import json
+import time
+import random
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_BOARD_RE = re.compile(r"^/communities/([^/]+)/questboard/v2$")
+_DETAIL_RE = re.compile(r"^/communities/([^/]+)/quests/v2/([^/]+)$")
+_CLAIM_RE = re.compile(r"^/communities/([^/]+)/quests/v2/([^/]+)/claim$")
+_TELEGRAM_RE = re.compile(r"^/bot[^/]*/sendMessage$")
+INJECTED_ERROR = (500, b'{"message":"injected error"}', "error")
+
+
+def filler_quest(quest_id, name):
+    """A quest detail with a task type the bot never claims."""
+    return {
+        "id": quest_id,
+        "name": name,
+        "tasks": [{"id": f"{quest_id}-task", "type": "quiz"}],
+        "description": {"type": "doc", "content": [{"type": "paragraph", "content": [{"type": "text", "text": name}]}]},
+        "locked": False,
+        "claimed": False,
+        "completed": False,
+        "inReview": False,
+        "retryAfter": None,
+    }
+
+
+class MockZealy:
+    """Thread-safe mock API state plus the HTTP server serving it."""
+
+    def __init__(self, communities, boxes=3, filler_quests=30, latency=0.0, error_rate=0.0,
+                 error_routes=("questboard", "detail"), seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_routes = frozenset(error_routes)
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.boards = {}
+        self.details = {}
+        self._board_bodies = {}  # slug -> cached JSON body, rebuilt after a drop
+        self.dropped_at = {}     # quest_id -> time.monotonic() it appeared
+        self.claims = []         # (quest_id, cookie, time.monotonic())
+        self.requests = Counter()
+        self.handler_cpu = 0.0
+        self._uploads = 0
+        for slug in communities:
+            self.boards[slug] = [{"id": f"{slug}-box{b}", "name": f"Box {b}", "quests": []} for b in range(boxes)]
+            for n in range(filler_quests):
+                quest = filler_quest(f"{slug}-filler-{n}", f"Filler {n}")
+                self._add(slug, quest)
+        self.server = None
+
+    def _add(self, slug, quest):
+        box = self.boards[slug][len(self.details) % len(self.boards[slug])]
+        box["quests"].append({"id": quest["id"], "name": quest["name"], "position": len(box["quests"])})
+        self.details[quest["id"]] = quest
+        self._board_bodies.pop(slug, None)
+
+    def drop(self, slug, quest):
+        """Put a new quest on a community's board and start its clock."""
+        with self._lock:
+            self._add(slug, quest)
+            self.dropped_at[quest["id"]] = time.monotonic()
+
+    def board_body(self, slug):
+        with self._lock:
+            body = self._board_bodies.get(slug)
+            if body is None:
+                body = self._board_bodies[slug] = json.dumps(self.boards[slug]).encode()
+            return body
+
+    def start(self):
+        """Start serving on a free localhost port; returns the base URL."""
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_HEAD(self):
+                self._send(200, b"")
+
+            def do_GET(self):
+                mock._handle(self, "GET")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                self.body = self.rfile.read(length) if length else b""
+                mock._handle(self, "POST")
+
+            def _send(self, status, body, content_type="application/json"):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if self.command != "HEAD":
+                    self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="mock-zealy", daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+
+    def _handle(self, handler, method):
+        started_cpu = time.thread_time()
+        path = handler.path.split("?", 1)[0]
+        status, body, route = self._route(handler, method, path)
+        with self._lock:
+            self.requests[route] += 1
+        if self.latency:
+            time.sleep(self.latency)
+        self.handler_cpu += time.thread_time() - started_cpu  # close enough without a lock
+        handler._send(status, body)
+
+    def _fails(self, route):
+        """Whether to answer this request with an injected 500 (decided before any side effect)."""
+        return route in self.error_routes and self.error_rate and self.random.random() < self.error_rate
+
+    def _route(self, handler, method, path):
+        if method == "POST" and _TELEGRAM_RE.match(path):
+            return 200, b'{"ok":true}', "telegram"
+        if method == "GET":
+            match = _BOARD_RE.match(path)
+            if match and match.group(1) in self.boards:
+                if self._fails("questboard"):
+                    return INJECTED_ERROR
+                return 200, self.board_body(match.group(1)), "questboard"
+            match = _DETAIL_RE.match(path)
+            if match:
+                quest = self.details.get(match.group(2))
+                if quest is not None:
+                    if self._fails("detail"):
+                        return INJECTED_ERROR
+                    return 200, json.dumps(quest).encode(), "detail"
+        elif method == "POST":
+            match = _CLAIM_RE.match(path)
+            if match:
+                if self._fails("claim"):
+                    return INJECTED_ERROR
+                with self._lock:
+                    self.claims.append((match.group(2), handler.headers.get("Cookie", ""), time.monotonic()))
+                return 200, b'{"status":"success"}', "claim"
+            if path == "/files":
+                with self._lock:
+                    self._uploads += 1
+                    n = self._uploads
+                return 200, json.dumps({"url": f"https://files.mock/{n}.png"}).encode(), "files"
+        return 404, b'{"message":"not found"}', "not_found"
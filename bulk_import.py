@@ -0,0 +1,119 @@
+import io
+import os
+import csv
+import zipfile
+import mimetypes
+import posixpath
+
+import fast_json
+from upload_jobs import UploadFile, UploadItem
+
+# runtime knobs
+# Largest import accepted, uncompressed (bytes)
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", str(200 * 1024 * 1024)))
+
+MANIFEST_NAMES = ("manifest.csv", "manifest.jsonl")
+FILE_PLATFORMS = ("instagram", "reddit")
+PLATFORMS = FILE_PLATFORMS + ("x",)
+
+
+class BulkImportError(ValueError):
+    """The import as a whole can't be read (no manifest, bad archive, too large)."""
+
+
+def read_zip(data):
+    """Return (manifest_name, manifest_bytes, files) from a ZIP archive.
+
+    The manifest is manifest.csv or manifest.jsonl anywhere in the archive;
+    files maps every other member's path, relative to the manifest's
+    directory, to its bytes.
+    """
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(data))
+    except zipfile.BadZipFile as e:
+        raise BulkImportError(f"Not a ZIP archive: {e}")
+    members = [info for info in archive.infolist() if not info.is_dir()]
+    if sum(info.file_size for info in members) > IMPORT_MAX_BYTES:
+        raise BulkImportError(f"Archive expands to more than IMPORT_MAX_BYTES ({IMPORT_MAX_BYTES})")
+    manifests = [info for info in members if posixpath.basename(info.filename) in MANIFEST_NAMES]
+    if not manifests:
+        raise BulkImportError(f"No {' or '.join(MANIFEST_NAMES)} in the archive")
+    manifest = min(manifests, key=lambda info: info.filename.count("/"))
+    root = posixpath.dirname(manifest.filename)
+    files = {}
+    for info in members:
+        if info is not manifest:
+            name = posixpath.relpath(info.filename, root) if root else info.filename
+            files[name] = archive.read(info)
+    return posixpath.basename(manifest.filename), archive.read(manifest), files
+
+
+def parse_manifest(name, data):
+    """Parse a CSV or JSONL manifest into row dicts.
+
+    Columns/keys: account, platform (instagram, reddit or x), link, files
+    (file names; in CSV separated by ';') and comment_url (X rows).
+    """
+    try:
+        text = data.decode("utf-8-sig")
+    except UnicodeDecodeError as e:
+        raise BulkImportError(f"{name} is not UTF-8: {e}")
+    if name.endswith(".jsonl"):
+        rows = []
+        for number, line in enumerate(text.splitlines(), 1):
+            if not line.strip():
+                continue
+            try:
+                row = fast_json.loads(line)
+            except ValueError as e:
+                raise BulkImportError(f"{name} line {number}: {e}")
+            if not isinstance(row, dict):
+                raise BulkImportError(f"{name} line {number}: expected an object")
+            rows.append(row)
+        return rows
+    rows = list(csv.DictReader(io.StringIO(text)))
+    for row in rows:
+        row["files"] = [part.strip() for part in (row.get("files") or "").split(";") if part.strip()]
+    return rows
+
+
+def build_items(rows, files, accounts=None):
+    """Turn manifest rows into UploadItems.
+
+    Returns (items, errors) where errors maps an item's index to why its
+    row was rejected. Rows for accounts outside ``accounts`` (if given)
+    are left out. Row numbers count data rows from 1.
+    """
+    items = []
+    errors = {}
+    for number, row in enumerate(rows, 1):
+        account_name = str(row.get("account") or "").strip()
+        if accounts is not None and account_name not in accounts:
+            continue
+        platform = str(row.get("platform") or "").strip().lower()
+        link = str(row.get("link") or "").strip()
+        names = row.get("files") or []
+        if isinstance(names, str):
+            names = [names]
+        comment_url = str(row.get("comment_url") or "").strip()
+        uploads = []
+        error = None
+        if not account_name or not link:
+            error = "account and link are required"
+        elif platform not in PLATFORMS:
+            error = f"unknown platform {platform!r} (expected {', '.join(PLATFORMS)})"
+        elif platform == "x":
+            if not comment_url:
+                error = "comment_url is required for x rows"
+        elif not names:
+            error = f"files are required for {platform} rows"
+        else:
+            missing = [name for name in names if name not in files]
+            if missing:
+                error = f"files not found: {', '.join(missing)}"
+            else:
+                uploads = [UploadFile(posixpath.basename(name), files[name], mimetypes.guess_type(name)[0] or "application/octet-stream") for name in names]
+        if error is not None:
+            errors[len(items)] = error
+        items.append(UploadItem(account_name, platform, link, uploads, comment_url if platform == "x" else None, number))
+    return items, errors
@@ -0,0 +1,318 @@
+import os
+import time
+import heapq
+import random
+import asyncio
+import logging
+import itertools
+import threading
+from collections import Counter, namedtuple
+
+import metrics
+from timers import TimerHeap
+from poll_scheduler import is_throttle_status, parse_retry_after
+
+# runtime knobs
+# Claim requests in flight at once for the whole process
+CLAIM_WORKERS = int(os.getenv("CLAIM_WORKERS", os.getenv("MAX_WORKERS", "10")))
+# Claims waiting for a worker; submit() blocks (backpressure) once this many are queued
+CLAIM_QUEUE_SIZE = int(os.getenv("CLAIM_QUEUE_SIZE", "256"))
+# Extra attempts after a 408/429/5xx or connection error
+CLAIM_RETRIES = int(os.getenv("CLAIM_RETRIES", "3"))
+CLAIM_RETRY_BASE = float(os.getenv("CLAIM_RETRY_BASE", "0.25"))      # seconds, doubled per attempt
+CLAIM_RETRY_MAX_DELAY = float(os.getenv("CLAIM_RETRY_MAX_DELAY", "10"))
+# Workers one account may hold while other accounts have claims waiting (0 = half the workers)
+CLAIM_ACCOUNT_WORKERS = int(os.getenv("CLAIM_ACCOUNT_WORKERS", "0"))
+# Most seconds a high-priority claim may jump ahead of earlier ones (bounds starvation)
+CLAIM_PRIORITY_WINDOW = float(os.getenv("CLAIM_PRIORITY_WINDOW", "5"))
+# Score that earns half of CLAIM_PRIORITY_WINDOW
+CLAIM_PRIORITY_PIVOT = float(os.getenv("CLAIM_PRIORITY_PIVOT", "50"))
+# Scoring: value of a non-XP reward, boost for limited claims, weight of recurring quests
+NON_XP_REWARD_VALUE = float(os.getenv("NON_XP_REWARD_VALUE", "100"))
+CLAIM_LIMIT_BOOST = float(os.getenv("CLAIM_LIMIT_BOOST", "10"))
+RECURRING_WEIGHT = float(os.getenv("RECURRING_WEIGHT", "0.75"))
+
+# key is (account_name, quest_id); send() makes one attempt and returns the
+# response (or raises); finish(response, error, transient) runs once at the
+# end; rank orders waiting claims, lowest first (see claim_rank)
+ClaimJob = namedtuple("ClaimJob", "key send finish attempt rank")
+
+
+def claim_priority(quest_data, cost=1.0):
+    """Score a claim from its quest detail: reward per unit of claim cost.
+
+    XP rewards count their value, other rewards NON_XP_REWARD_VALUE. A
+    claimLimit makes the quest scarce (boosted by CLAIM_LIMIT_BOOST /
+    claimLimit); a recurring quest comes back, so it weighs RECURRING_WEIGHT.
+    """
+    reward = 0.0
+    for item in quest_data.get("rewards") or ():
+        value = item.get("value")
+        if item.get("type") == "xp" and isinstance(value, (int, float)):
+            reward += value
+        else:
+            reward += NON_XP_REWARD_VALUE
+    claim_limit = quest_data.get("claimLimit")
+    if isinstance(claim_limit, (int, float)) and claim_limit > 0:
+        reward *= 1 + CLAIM_LIMIT_BOOST / claim_limit
+    if (quest_data.get("recurrence") or "once") != "once":
+        reward *= RECURRING_WEIGHT
+    return reward / max(cost, 0.01)
+
+
+def claim_rank(priority, now=None):
+    """Heap key for a claim: its arrival time minus a head start that grows with priority.
+
+    The head start is capped at CLAIM_PRIORITY_WINDOW, so a claim is never
+    overtaken by one that arrived more than that many seconds after it.
+    """
+    now = time.monotonic() if now is None else now
+    priority = max(0.0, priority)
+    return now - CLAIM_PRIORITY_WINDOW * priority / (priority + CLAIM_PRIORITY_PIVOT) if priority else now
+
+
+class ClaimQueue:
+    """Waiting claims in one heap per account, plus how many each account has being sent.
+
+    ``pop`` takes the best-ranked claim among accounts using fewer than
+    ``account_workers`` workers, and only falls back to a busy account when
+    nobody else is waiting, so a burst from one account can't monopolise
+    the workers yet no worker idles. Not thread-safe; the dispatchers lock.
+    """
+
+    def __init__(self, account_workers):
+        self.account_workers = max(1, account_workers)
+        self._heaps = {}
+        self._seq = itertools.count()
+        self._size = 0
+        self.busy = Counter()
+
+    def __len__(self):
+        return self._size
+
+    def push(self, job):
+        heapq.heappush(self._heaps.setdefault(job.key[0], []), (job.rank, next(self._seq), job))
+        self._size += 1
+
+    def pop(self):
+        best = fallback = None
+        for account, heap in self._heaps.items():
+            head = heap[0]
+            if fallback is None or head < fallback[0]:
+                fallback = (head, account)
+            if self.busy[account] < self.account_workers and (best is None or head < best[0]):
+                best = (head, account)
+        head, account = best or fallback
+        heap = self._heaps[account]
+        heapq.heappop(heap)
+        if not heap:
+            del self._heaps[account]
+        self._size -= 1
+        self.busy[account] += 1
+        return head[2]
+
+    def done(self, job):
+        account = job.key[0]
+        self.busy[account] -= 1
+        if self.busy[account] <= 0:
+            del self.busy[account]
+
+
+def default_account_workers(workers):
+    return CLAIM_ACCOUNT_WORKERS if CLAIM_ACCOUNT_WORKERS > 0 else max(1, -(-workers // 2))
+
+
+def is_transient(response, error):
+    """Whether a claim attempt failed in a way worth retrying."""
+    if error is not None:
+        return True
+    status_code = response.status_code
+    return status_code == 408 or is_throttle_status(status_code)
+
+
+def retry_delay(attempt, response=None, base=CLAIM_RETRY_BASE, max_delay=CLAIM_RETRY_MAX_DELAY):
+    """Full-jitter exponential backoff, never sooner than the server's Retry-After."""
+    delay = random.uniform(0, min(max_delay, base * (2 ** attempt)))
+    retry_after = parse_retry_after(response.headers.get("Retry-After")) if response is not None else None
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, max_delay))
+    return delay
+
+
+class ClaimDispatcher:
+    """One bounded claim queue and worker pool for every account in the process.
+
+    - at most ``workers`` claims are in flight, however many accounts run
+    - waiting claims go out by priority (see claim_priority / claim_rank),
+      with each account's share of the workers capped while others wait
+    - a (account, quest) already queued or in flight is not submitted again
+    - transient failures are retried with jittered backoff; a retry waits
+      on a timer, not on a worker
+    - ``finish`` gets the last response or error once the job is done, with
+      transient=True when the dispatcher gave up on a retryable failure
+    """
+
+    def __init__(self, workers=CLAIM_WORKERS, queue_size=CLAIM_QUEUE_SIZE, retries=CLAIM_RETRIES, account_workers=None):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.retries = max(0, retries)
+        self._queue = ClaimQueue(account_workers or default_account_workers(self.workers))
+        self._cond = threading.Condition()
+        self._in_flight = set()
+        self._lock = threading.Lock()
+        self._retries = TimerHeap("claim-retry")
+        self._started = False
+
+    def _start(self):
+        with self._lock:
+            if self._started:
+                return
+            self._started = True
+        for i in range(self.workers):
+            threading.Thread(target=self._work, name=f"claim-{i}", daemon=True).start()
+
+    def submit(self, key, send, finish, priority=0.0):
+        """Queue a claim; returns False if the same key is already queued or in flight."""
+        with self._lock:
+            if key in self._in_flight:
+                return False
+            self._in_flight.add(key)
+        self._start()
+        job = ClaimJob(key, send, finish, 0, claim_rank(priority))
+        with self._cond:
+            while len(self._queue) >= self.queue_size:
+                self._cond.wait()
+            self._queue.push(job)
+            self._cond.notify_all()
+        return True
+
+    def depth(self):
+        with self._cond:
+            return len(self._queue)
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._in_flight)
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not len(self._queue):
+                    self._cond.wait()
+                job = self._queue.pop()
+                # Room for a blocked submit()
+                self._cond.notify_all()
+            try:
+                self._attempt(job)
+            finally:
+                with self._cond:
+                    self._queue.done(job)
+
+    def _attempt(self, job):
+        response = error = None
+        try:
+            response = job.send()
+        except Exception as e:
+            error = e
+        transient = is_transient(response, error)
+        if transient and job.attempt < self.retries:
+            metrics.CLAIM_RETRIES.inc()
+            self._retry_later(retry_delay(job.attempt, response), job._replace(attempt=job.attempt + 1))
+            return
+        with self._lock:
+            self._in_flight.discard(job.key)
+        try:
+            job.finish(response, error, transient)
+        except Exception as e:
+            logging.exception("[%s] Error finishing claim of %s: %s", job.key[0], job.key[1], e)
+
+    def _retry_later(self, delay, job):
+        self._retries.schedule(job.key, time.monotonic() + delay, lambda: self._requeue(job))
+
+    def _requeue(self, job):
+        # Already admitted: a retry keeps its rank and doesn't wait for queue room
+        with self._cond:
+            self._queue.push(job)
+            self._cond.notify_all()
+
+
+class AsyncClaimDispatcher:
+    """ClaimDispatcher for ENGINE=async: same bounds, dedup and retries, as tasks on the event loop.
+
+    ``send`` and ``finish`` are coroutine functions.
+    """
+
+    def __init__(self, workers=CLAIM_WORKERS, queue_size=CLAIM_QUEUE_SIZE, retries=CLAIM_RETRIES, account_workers=None):
+        self.workers = max(1, workers)
+        self.queue_size = max(1, queue_size)
+        self.retries = max(0, retries)
+        self._queue = ClaimQueue(account_workers or default_account_workers(self.workers))
+        self._cond = None
+        self._in_flight = set()
+        self._tasks = set()
+
+    def _start(self):
+        if self._cond is None:
+            # Created on first use so it binds to the running loop
+            self._cond = asyncio.Condition()
+            for i in range(self.workers):
+                self._spawn(self._work(), f"claim-{i}")
+
+    def _spawn(self, coro, name=None):
+        # Hold a reference until the task finishes so it isn't garbage collected
+        task = asyncio.create_task(coro, name=name)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def submit(self, key, send, finish, priority=0.0):
+        """Queue a claim; returns False if the same key is already queued or in flight."""
+        if key in self._in_flight:
+            return False
+        self._in_flight.add(key)
+        self._start()
+        job = ClaimJob(key, send, finish, 0, claim_rank(priority))
+        async with self._cond:
+            await self._cond.wait_for(lambda: len(self._queue) < self.queue_size)
+            self._queue.push(job)
+            self._cond.notify_all()
+        return True
+
+    def depth(self):
+        return len(self._queue)
+
+    def in_flight(self):
+        return len(self._in_flight)
+
+    async def _work(self):
+        while True:
+            async with self._cond:
+                await self._cond.wait_for(lambda: len(self._queue))
+                job = self._queue.pop()
+                self._cond.notify_all()
+            try:
+                await self._attempt(job)
+            finally:
+                self._queue.done(job)
+
+    async def _attempt(self, job):
+        response = error = None
+        try:
+            response = await job.send()
+        except Exception as e:
+            error = e
+        transient = is_transient(response, error)
+        if transient and job.attempt < self.retries:
+            metrics.CLAIM_RETRIES.inc()
+            self._spawn(self._retry_later(retry_delay(job.attempt, response), job._replace(attempt=job.attempt + 1)))
+            return
+        self._in_flight.discard(job.key)
+        try:
+            await job.finish(response, error, transient)
+        except Exception as e:
+            logging.exception("[%s] Error finishing claim of %s: %s", job.key[0], job.key[1], e)
+
+    async def _retry_later(self, delay, job):
+        await asyncio.sleep(delay)
+        async with self._cond:
+            self._queue.push(job)
+            self._cond.notify_all()
@@ -0,0 +1,45 @@
+import os
+from collections import namedtuple
+
+# runtime knobs
+# API base URL; point it at a mock (see benchmarks/mock_zealy.py) for testing
+ZEALY_API = os.getenv("ZEALY_API", "https://api-v1.zealy.io").rstrip("/")
+
+# Everything that depends on the community slug
+Community = namedtuple(
+    "Community",
+    "slug api_url quest_detail_url_template claim_url_template frontend_url headers",
+)
+
+_communities = {}
+
+
+def get_community(slug):
+    """Return the (cached) Community for a slug with its URL templates and headers."""
+    slug = slug.strip()
+    community = _communities.get(slug)
+    if community is None:
+        community = Community(
+            slug=slug,
+            api_url=f"{ZEALY_API}/communities/{slug}/questboard/v2",
+            quest_detail_url_template=f"{ZEALY_API}/communities/{slug}/quests/v2/{{quest_id}}",
+            claim_url_template=f"{ZEALY_API}/communities/{slug}/quests/v2/{{quest_id}}/claim",
+            frontend_url=f"https://zealy.io/cw/{slug}/questboard/{{box_id}}/{{quest_id}}",
+            # Per-request header overrides on top of the account session's defaults
+            headers={
+                "Referer": f"https://zealy.io/cw/{slug}/questboard",
+                "X-Zealy-Subdomain": slug,
+            },
+        )
+        _communities[slug] = community
+    return community
+
+
+def parse_communities(value, default=()):
+    """Parse a comma-separated list of community slugs, keeping order and dropping duplicates."""
+    slugs = [slug.strip() for slug in (value or "").split(",") if slug.strip()]
+    return list(dict.fromkeys(slugs)) or list(default)
+
+
+# Communities every account watches unless ACCOUNT_N_COMMUNITIES says otherwise
+COMMUNITIES = parse_communities(os.getenv("COMMUNITIES"))
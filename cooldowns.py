@@ -0,0 +1,69 @@
+import os
+import time
+from datetime import datetime
+from collections import namedtuple
+
+# runtime knobs
+# Wake this many seconds before a cooldown ends to re-fetch the quest detail in time
+COOLDOWN_WAKE_LEAD = float(os.getenv("COOLDOWN_WAKE_LEAD", "0.5"))
+# Cooldowns further out than this are left to the regular board rescans
+MAX_COOLDOWN_WAIT = float(os.getenv("MAX_COOLDOWN_WAIT", str(8 * 24 * 3600)))
+
+# Put in an account's inbox when a timer fires. refresh=True: fetch the
+# account's view of the quest first; False: the cooldown is over, claim.
+QuestWake = namedtuple("QuestWake", "feed item refresh")
+
+
+def retry_after_seconds(value, now=None):
+    """Seconds until a quest's retryAfter, or None if it has none.
+
+    Accepts seconds from now, an epoch timestamp (seconds or milliseconds)
+    or an ISO 8601 date.
+    """
+    if value in (None, "", 0, False):
+        return None
+    now = time.time() if now is None else now
+    if isinstance(value, str):
+        try:
+            value = float(value)
+        except ValueError:
+            try:
+                return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp() - now
+            except ValueError:
+                return None
+    if not isinstance(value, (int, float)):
+        return None
+    if value > 1e12:
+        return value / 1000 - now
+    if value > 1e9:
+        return value - now
+    return float(value)
+
+
+def is_recurring(quest_data):
+    return (quest_data.get("recurrence") or "once") != "once"
+
+
+def claimable_in(quest_data, now=None):
+    """Seconds until this view of a quest can be claimed: 0.0 now, None if waiting won't help.
+
+    A quest in cooldown (retryAfter in the future) is claimable when it ends,
+    unless it is a one-off that can't be retried. Locked, in-review,
+    completed or claimed quests without a cooldown are not claimable.
+    """
+    if quest_data.get("locked") or quest_data.get("inReview"):
+        return None
+    wait = retry_after_seconds(quest_data.get("retryAfter"), now)
+    if wait is not None and wait > 0:
+        if quest_data.get("canRetry") is False and not is_recurring(quest_data):
+            return None
+        return wait
+    if quest_data.get("claimed") or quest_data.get("completed"):
+        return None
+    return 0.0
+
+
+def wake_at(wait, refresh=True):
+    """Monotonic time to wake for a quest claimable in ``wait`` seconds."""
+    lead = COOLDOWN_WAKE_LEAD if refresh else 0.0
+    return time.monotonic() + max(0.0, wait - lead)
@@ -0,0 +1,120 @@
+import os
+import json
+import logging
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional, pip install orjson
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:  # optional, pip install msgspec
+    msgspec = None
+
+# runtime knobs
+# "auto" picks orjson, then msgspec, then the stdlib; or force "orjson" / "msgspec" / "json"
+JSON_BACKEND = os.getenv("JSON_BACKEND", "auto").lower()
+# Keep only the quest detail fields the matchers and schedulers use (0 keeps everything)
+SLIM_QUEST_DETAILS = os.getenv("SLIM_QUEST_DETAILS", "1") == "1"
+
+# Quest detail fields worth holding on to in the caches; position, opened,
+# conditions and the like are never looked at after parsing.
+QUEST_FIELDS = (
+    "id", "name", "tasks", "description", "categoryId",
+    "locked", "claimed", "completed", "inReview", "retryAfter", "canRetry",
+    "claimLimit", "recurrence", "rewards",
+)
+
+
+def _pick_backend(name):
+    available = {"orjson": orjson is not None, "msgspec": msgspec is not None, "json": True}
+    if name == "auto":
+        return next(backend for backend, ok in available.items() if ok)
+    if not available.get(name):
+        logging.warning("JSON_BACKEND=%s is not available, falling back to json", name)
+        return "json"
+    return name
+
+
+BACKEND = _pick_backend(JSON_BACKEND)
+
+
+if BACKEND == "orjson":
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return orjson.loads(data)
+
+    def dumpb(obj, sort_keys=False):
+        """Serialize obj to compact JSON bytes."""
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+
+elif BACKEND == "msgspec":
+    _encoder = msgspec.json.Encoder(enc_hook=str)
+    _sorted_encoder = msgspec.json.Encoder(enc_hook=str, order="sorted")
+
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return msgspec.json.decode(data)
+
+    def dumpb(obj, sort_keys=False):
+        """Serialize obj to compact JSON bytes."""
+        return (_sorted_encoder if sort_keys else _encoder).encode(obj)
+
+else:
+    def loads(data):
+        """Parse JSON from bytes or str."""
+        return json.loads(data)
+
+    def dumpb(obj, sort_keys=False):
+        """Serialize obj to compact JSON bytes."""
+        return json.dumps(obj, sort_keys=sort_keys, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def dumps(obj, sort_keys=False):
+    """Serialize obj to a compact JSON string."""
+    return dumpb(obj, sort_keys).decode("utf-8")
+
+
+def load_file(path):
+    """Read and parse a JSON file."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+if msgspec is not None:
+    # Only QUEST_FIELDS are decoded; everything else in the document is skipped
+    # by the parser instead of being built and thrown away.
+    QuestDetail = msgspec.defstruct(
+        "QuestDetail",
+        [(field, Any, msgspec.UNSET) for field in QUEST_FIELDS],
+        omit_defaults=True,
+    )
+    _quest_decoder = msgspec.json.Decoder(QuestDetail)
+
+    def _decode_slim_quest(data):
+        detail = _quest_decoder.decode(data)
+        return {
+            field: value
+            for field in QUEST_FIELDS
+            if (value := getattr(detail, field)) is not msgspec.UNSET
+        }
+else:
+    QuestDetail = None
+
+    def _decode_slim_quest(data):
+        quest = loads(data)
+        return {field: quest[field] for field in QUEST_FIELDS if field in quest}
+
+
+def decode_quest(data):
+    """Parse a quest detail response body into the dict the matchers use.
+
+    With SLIM_QUEST_DETAILS only QUEST_FIELDS are kept (decoded straight from
+    the body when msgspec is installed), which cuts both parse time and what
+    every cached quest holds on to.
+    """
+    if SLIM_QUEST_DETAILS:
+        return _decode_slim_quest(data)
+    return loads(data)
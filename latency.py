@@ -0,0 +1,73 @@
+import os
+import threading
+from collections import deque
+
+# runtime knobs
+# Claims kept per stage for the latency percentiles
+LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "1000"))
+
+# Where the milliseconds of one claim go:
+#   detect   board response received -> task matched for this account
+#   dispatch matched -> claim POST leaving (payload, request prep, worker handoff)
+#   response claim POST sent -> response received
+#   total    board response received -> claim response received
+CLAIM_STAGES = ("detect", "dispatch", "response", "total")
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LatencyTracker:
+    """Rolling per-stage latency samples (milliseconds) for claims.
+
+    Timestamps are time.monotonic() values taken at each step; ``record``
+    turns them into stage durations and keeps the last ``window`` of each.
+    """
+
+    def __init__(self, window=LATENCY_WINDOW):
+        self._samples = {stage: deque(maxlen=max(1, window)) for stage in CLAIM_STAGES}
+        self._by_kind = {}
+        self._lock = threading.Lock()
+        self.count = 0
+
+    def record(self, kind, detected_at, matched_at, sent_at, responded_at):
+        """Record one claim's timeline; returns its stage durations in ms."""
+        stages = {
+            "detect": (matched_at - detected_at) * 1000,
+            "dispatch": (sent_at - matched_at) * 1000,
+            "response": (responded_at - sent_at) * 1000,
+            "total": (responded_at - detected_at) * 1000,
+        }
+        with self._lock:
+            self.count += 1
+            for stage, value in stages.items():
+                self._samples[stage].append(value)
+            kind_totals = self._by_kind.get(kind)
+            if kind_totals is None:
+                kind_totals = self._by_kind[kind] = deque(maxlen=self._samples["total"].maxlen)
+            kind_totals.append(stages["total"])
+        return stages
+
+    def summary(self):
+        """Return {stage: {count, p50, p90, p99, max}} plus per-kind totals under "by_kind"."""
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self._samples.items()}
+            by_kind = {kind: sorted(values) for kind, values in self._by_kind.items()}
+
+        def describe(values):
+            return {
+                "count": len(values),
+                "p50": percentile(values, 0.50),
+                "p90": percentile(values, 0.90),
+                "p99": percentile(values, 0.99),
+                "max": values[-1] if values else 0.0,
+            }
+
+        result = {stage: describe(values) for stage, values in samples.items()}
+        result["by_kind"] = {kind: describe(values) for kind, values in by_kind.items()}
+        return result
@@ -0,0 +1,253 @@
+import os
+import time
+import logging
+import threading
+
+import fast_json
+import storage
+
+# Legacy mapping files under uploads/<account>/ per platform
+PLATFORM_FILES = {
+    "instagram": "links.json",
+    "reddit": "reddit_links.json",
+    "x": "x_links.json",
+}
+
+# One table per platform
+PLATFORM_TABLES = {
+    "instagram": "instagram_links",
+    "reddit": "reddit_links",
+    "x": "x_links",
+}
+
+# runtime knobs
+# How often (seconds) a lookup may check whether another connection changed the store
+LINK_STORE_RECHECK = float(os.getenv("LINK_STORE_RECHECK", "1"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS {table} (
+    account TEXT NOT NULL,
+    link_key TEXT NOT NULL,
+    link TEXT NOT NULL,
+    value TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    PRIMARY KEY (account, link_key)
+) WITHOUT ROWID
+"""
+
+# A counter every row change to a link table bumps, whoever makes it
+SEQ_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS link_store_seq (id INTEGER PRIMARY KEY CHECK (id = 0), seq INTEGER NOT NULL)",
+    "INSERT OR IGNORE INTO link_store_seq (id, seq) VALUES (0, 0)",
+)
+SEQ_TRIGGER = """
+CREATE TRIGGER IF NOT EXISTS {table}_{event}_seq AFTER {event} ON {table}
+BEGIN UPDATE link_store_seq SET seq = seq + 1 WHERE id = 0; END
+"""
+
+
+def normalize_x_url(url):
+    """Remove URL parameters and normalize X/Twitter URLs for comparison."""
+    if '?' in url:
+        url = url.split('?')[0]
+    # Normalize case for domain
+    url = url.lower().replace('twitter.com', 'x.com')
+    return url
+
+
+def normalize_link(platform, link):
+    """Return the index key for a link on the given platform."""
+    link = link.strip()
+    if platform == "x":
+        return normalize_x_url(link)
+    return link
+
+
+class LinkStore:
+    """Uploaded link mappings in SQLite, with an in-memory read index.
+
+    Each platform has its own table keyed on (account, normalized link), so
+    uploads and claims from any thread are individual transactions instead of
+    whole-file rewrites. Lookups are served from a per-account dict that is
+    updated on every write made here. Triggers count every change to the
+    link tables; when the count moves past the changes this store made
+    itself (another process, a manual edit), the dicts are reloaded.
+    ``on_change(account_name)`` is called after each write made here.
+    """
+
+    def __init__(self, path=storage.STATE_DB, base_dir="uploads", on_change=None):
+        self.path = path
+        self.base_dir = base_dir
+        self.on_change = on_change
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        self._schema_ready = False
+        self._indexes = {}  # (account, platform) -> {link_key: (link, value)}
+        self._seq = None  # change count the indexes reflect
+        self._own_writes = []  # (before, after] change counts of commits made here
+        self._checked_at = 0.0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = storage.connect(self.path)
+            with self._lock:
+                if not self._schema_ready:
+                    for statement in SEQ_SCHEMA:
+                        conn.execute(statement)
+                    for table in PLATFORM_TABLES.values():
+                        conn.execute(SCHEMA.format(table=table))
+                        for event in ("INSERT", "UPDATE", "DELETE"):
+                            conn.execute(SEQ_TRIGGER.format(table=table, event=event))
+                    self._seq = self._read_seq(conn)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    # -- in-memory index -------------------------------------------------
+
+    @staticmethod
+    def _read_seq(conn):
+        return conn.execute("SELECT seq FROM link_store_seq WHERE id = 0").fetchone()[0]
+
+    def _refresh_if_changed(self):
+        """Drop cached indexes if someone else changed the link tables. Caller holds the lock.
+
+        Changes made here are already in the indexes, so only a count not
+        covered by this store's own commits forces a reload.
+        """
+        now = time.monotonic()
+        if now - self._checked_at < LINK_STORE_RECHECK:
+            return
+        self._checked_at = now
+        seq = self._read_seq(self._conn())
+        if seq == self._seq:
+            return
+        covered = self._seq
+        for before, after in sorted(self._own_writes):
+            if after <= covered:
+                continue
+            if before > covered:
+                break
+            covered = after
+        if covered < seq:
+            self._indexes.clear()
+        self._own_writes = [write for write in self._own_writes if write[1] > seq]
+        self._seq = seq
+
+    def _index(self, account_name, platform):
+        """Return the cached index for an account/platform. Caller holds the lock."""
+        key = (account_name, platform)
+        index = self._indexes.get(key)
+        if index is None:
+            rows = self._conn().execute(
+                f"SELECT link_key, link, value FROM {PLATFORM_TABLES[platform]} WHERE account = ?",
+                (account_name,),
+            )
+            index = {link_key: (link, fast_json.loads(value)) for link_key, link, value in rows}
+            self._indexes[key] = index
+        return index
+
+    # -- public API ------------------------------------------------------
+
+    def load_account(self, account_name):
+        """Import legacy JSON files for an account and warm its index (called once at startup)."""
+        for platform in PLATFORM_FILES:
+            self._migrate_json(account_name, platform)
+        with self._lock:
+            for platform in PLATFORM_FILES:
+                self._index(account_name, platform)
+
+    def _migrate_json(self, account_name, platform):
+        json_path = os.path.join(self.base_dir, account_name, PLATFORM_FILES[platform])
+        if not os.path.exists(json_path):
+            return
+        try:
+            links = fast_json.load_file(json_path)
+        except (OSError, ValueError) as e:
+            logging.error("[%s] Could not migrate %s: %s", account_name, json_path, e)
+            return
+        self.put_many(account_name, platform, links.items())
+        os.replace(json_path, json_path + ".migrated")
+        logging.info("[%s] Migrated %d %s links from %s", account_name, len(links), platform, json_path)
+
+    def lookup(self, account_name, platform, link):
+        """Return the stored value for link, or None."""
+        with self._lock:
+            self._refresh_if_changed()
+            entry = self._index(account_name, platform).get(normalize_link(platform, link))
+        return entry[1] if entry is not None else None
+
+    def put(self, account_name, platform, link, value):
+        """Store a mapping, replacing any mapping for the same normalized link."""
+        self.put_many(account_name, platform, [(link, value)])
+
+    def put_many(self, account_name, platform, items):
+        """Store several mappings for one account in a single transaction."""
+        self.put_batch(account_name, [(platform, link, value) for link, value in items])
+
+    def put_batch(self, account_name, entries):
+        """Store (platform, link, value) mappings of any platforms for one account in a single transaction."""
+        now = time.time()
+        rows = [(platform, (account_name, normalize_link(platform, link), link, fast_json.dumps(value), now)) for platform, link, value in entries]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._read_seq(conn)
+            for platform in dict.fromkeys(platform for platform, _ in rows):
+                conn.executemany(
+                    f"INSERT OR REPLACE INTO {PLATFORM_TABLES[platform]} (account, link_key, link, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [row for row_platform, row in rows if row_platform == platform],
+                )
+            after = self._read_seq(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            if after > before:
+                self._own_writes.append((before, after))
+            for platform, (_, link_key, link, value, _) in rows:
+                index = self._indexes.get((account_name, platform))
+                if index is not None:
+                    index[link_key] = (link, fast_json.loads(value))
+        if self.on_change is not None and rows:
+            self.on_change(account_name)
+
+    def claim(self, account_name, platform, link):
+        """Atomically fetch and delete the mapping matching link.
+
+        Returns (stored_link, value), or None if there was nothing to claim
+        (e.g. another thread claimed it first).
+        """
+        link_key = normalize_link(platform, link)
+        table = PLATFORM_TABLES[platform]
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            before = self._read_seq(conn)
+            row = conn.execute(
+                f"SELECT link, value FROM {table} WHERE account = ? AND link_key = ?",
+                (account_name, link_key),
+            ).fetchone()
+            if row is not None:
+                conn.execute(f"DELETE FROM {table} WHERE account = ? AND link_key = ?", (account_name, link_key))
+            after = self._read_seq(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        with self._lock:
+            if after > before:
+                self._own_writes.append((before, after))
+            index = self._indexes.get((account_name, platform))
+            if index is not None:
+                index.pop(link_key, None)
+        if row is None:
+            return None
+        return row[0], fast_json.loads(row[1])
+
+    def remove(self, account_name, platform, link):
+        """Remove the mapping matching link. Returns the stored link removed, or None."""
+        claimed = self.claim(account_name, platform, link)
+        return claimed[0] if claimed else None
@@ -1,55 +1,84 @@
 import os
-import requests
-from concurrent.futures import ThreadPoolExecutor
+import queue
+from urllib.parse import urlsplit
+import asyncio
 import time
 import threading
 import logging
-import json
 from dotenv import load_dotenv
-from flask import Flask, request, render_template_string
+from flask import Flask, Response, request, render_template_string
+from notifier import TelegramNotifier, PRIORITY_CLAIM, PRIORITY_ERROR, PRIORITY_INFO
+from link_store import LinkStore
+from quest_cache import QuestDetailCache
+from latency import LatencyTracker
+from seen_store import SeenStore
+from claim_dispatcher import ClaimDispatcher, AsyncClaimDispatcher, claim_priority
+from task_handlers import TASK_HANDLERS, HandlerRegistry, default_handlers, parse_enabled
+from timers import TimerHeap, AsyncTimers
+from upload_jobs import UploadFile, UploadItem, UploadJobs
+from upload_cache import UploadCache
+from bulk_import import IMPORT_MAX_BYTES, BulkImportError, build_items, parse_manifest, read_zip
+from cooldowns import COOLDOWN_WAKE_LEAD, MAX_COOLDOWN_WAIT, QuestWake, claimable_in, is_recurring, wake_at
+import async_http
+import transport
+import fast_json
+import metrics
+from communities import COMMUNITIES, ZEALY_API, get_community, parse_communities
+from questboard_feed import CommunityFeed, AsyncCommunityFeed, FeedScheduler, needs_account_view
 
 load_dotenv()
 
 app = Flask(__name__)
 
-# Global dict to store sessions per account
+# Global dict to store each account's AccountTransport (poll/claim/upload sessions)
 sessions = {}
 
 # Optional Telegram notifications (set via environment variables)
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN", "")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID", "")
-TELEGRAM_API = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage" if TELEGRAM_BOT_TOKEN else None
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org").rstrip("/")
+TELEGRAM_API = f"{TELEGRAM_API_URL}/bot{TELEGRAM_BOT_TOKEN}/sendMessage" if TELEGRAM_BOT_TOKEN else None
 
   
 
 # runtime knobs
 POLL_INTERVAL = float(os.getenv("POLL_INTERVAL", "2"))
-MAX_WORKERS = int(os.getenv("MAX_WORKERS", "10"))
+# Rescan every quest on the board at least this often, so quests put back
+# (transient claim failures, recurring quests) get matched again; storing a
+# link mapping rescans its account's boards straight away
+BOARD_RESCAN_INTERVAL = float(os.getenv("BOARD_RESCAN_INTERVAL", "30"))
+# "threads" (one thread per account) or "async" (all accounts on one event loop, needs httpx)
+ENGINE = os.getenv("ENGINE", "threads").lower()
+# Worker processes to shard accounts across (1 = everything in this process, see supervisor.py)
+WORKERS = int(os.getenv("WORKERS", "1"))
 
 # 🔧 CONFIGURABLE COMMUNITY NAME
-community = "reef"  # ← Change this to any community slug like "teneo", "fermion protocol "
+community = "reef"  # ← Default community slug like "teneo", "fermion protocol "
+# Watch several at once with COMMUNITIES=reef,teneo (or ACCOUNT_N_COMMUNITIES per account)
+default_communities = COMMUNITIES or [community]
 
-# ⛓️ Dynamically Construct URLs
-api_url = f"https://api-v1.zealy.io/communities/{community}/questboard/v2"
-quest_detail_url_template = f"https://api-v1.zealy.io/communities/{community}/quests/v2/{{quest_id}}"
-
-claim_url_template = f"https://api-v1.zealy.io/communities/{community}/quests/v2/{{quest_id}}/claim"
-frontend_url = f"https://zealy.io/cw/{community}/questboard/{{box_id}}/{{quest_id}}"
-file_upload = f"https://api-v1.zealy.io/files"
+# ⛓️ Per-community URLs and headers are built by communities.get_community()
+file_upload = f"{ZEALY_API}/files"
 
 # 🔎 Filters
 params = {
     "filters": ["locked", "available", "inCooldown"]  # Removed "inReview" to avoid refinding claimed quests
 }
 
+# The shared feed polls with a single account, so it also asks for quests that
+# account already has in review; otherwise a quest claimed by the poller would
+# vanish for every other account. Each account's seen set still skips re-claims.
+feed_params = {
+    "filters": params["filters"] + ["inReview"]
+}
+
 # 🔐 DEFAULT HEADERS (will be copied per-account; replace Cookie per account)
 headers = {
-    "Host": "api-v1.zealy.io",
+    "Host": urlsplit(ZEALY_API).netloc,
     "Accept": "application/json",
     "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
     "Accept-Language": "en-US,en;q=0.9",
-    "Referer": f"https://zealy.io/cw/{community}/questboard",
-    "X-Zealy-Subdomain": community,
+    "Referer": "https://zealy.io/",  # community requests override Referer / X-Zealy-Subdomain
     "Origin": "https://zealy.io",
     "Sec-Fetch-Site": "same-site",
     "Sec-Fetch-Mode": "cors",
@@ -59,47 +88,22 @@ headers = {
     "Sec-Ch-Ua-Mobile": "?0",
     "Accept-Encoding": "gzip, deflate, br",
     "X-Next-App-Key": "",
-    "Cookie": ''  # placeholder; per-account sessions will set this
+    "Cookie": ''  # placeholder; per-account transports will set this
 }
 
-def send_telegram_message(text: str) -> None:
-    """Send a message to the configured Telegram chat. No-op if not configured."""
-    if not TELEGRAM_API or not TELEGRAM_CHAT_ID:
-        return
+# Telegram delivery runs on a background worker so the poll loop never waits on it
+notifier = TelegramNotifier(TELEGRAM_API, TELEGRAM_CHAT_ID)
 
-    import time
-    max_retries = 3
-    base_delay = 2
+def send_telegram_message(text: str, priority: int = PRIORITY_INFO) -> None:
+    """Queue a message for the configured Telegram chat. No-op if not configured."""
+    notifier.send(text, priority)
 
-    for attempt in range(max_retries):
-        try:
-            payload = {"chat_id": TELEGRAM_CHAT_ID, "text": text}
-            # Increased timeout and added retry logic
-            resp = requests.post(TELEGRAM_API, data=payload, timeout=30)
-            if resp.status_code == 200:
-                return  # Success, exit function
-            else:
-                logging.warning("Telegram API returned %s: %s (attempt %d/%d)",
-                              resp.status_code, resp.text, attempt + 1, max_retries)
-        except requests.exceptions.RequestException as exc:
-            if attempt < max_retries - 1:
-                delay = base_delay * (2 ** attempt)  # Exponential backoff
-                logging.warning("Telegram request failed (attempt %d/%d): %s. Retrying in %d seconds...",
-                              attempt + 1, max_retries, exc, delay)
-                time.sleep(delay)
-            else:
-                logging.error("Failed to send Telegram message after %d attempts: %s", max_retries, exc)
-        except Exception as exc:
-            logging.exception("Unexpected error sending Telegram message: %s", exc)
-            return
-
-def make_session_with_cookie(cookie_value: str):
-    """Return a requests.Session with default headers and a Cookie value."""
-    sess = requests.Session()
-    sess.headers.update(headers)
+def make_transport(cookie_value: str):
+    """Return an AccountTransport whose sessions carry the default headers and a Cookie value."""
+    account_headers = dict(headers)
     if cookie_value:
-        sess.headers.update({"Cookie": cookie_value})
-    return sess
+        account_headers["Cookie"] = cookie_value
+    return transport.AccountTransport(account_headers)
 
 def parse_accounts_env():
     """Parse accounts from environment.
@@ -107,6 +111,9 @@ def parse_accounts_env():
     Priority:
       1) Per-account env vars: ACCOUNT_1_NAME / ACCOUNT_1_COOKIE ... ACCOUNT_N_NAME / ACCOUNT_N_COOKIE
       2) Fallback single account using headers Cookie
+
+    Each account watches ACCOUNT_N_COMMUNITIES (comma-separated) or the
+    default communities.
     """
     accounts = []
 
@@ -123,422 +130,170 @@ def parse_accounts_env():
             # strip surrounding quotes if present
             if (cookie.startswith('"') and cookie.endswith('"')) or (cookie.startswith("'") and cookie.endswith("'")):
                 cookie = cookie[1:-1]
-        accounts.append({"name": name or f"account_{i}", "cookie": cookie or ""})
+        account_communities = parse_communities(os.getenv(f"ACCOUNT_{i}_COMMUNITIES"), default_communities)
+        accounts.append({"name": name or f"account_{i}", "cookie": cookie or "", "communities": account_communities})
 
     # If no accounts found, try to use the default cookie from headers
     if not accounts:
         default_cookie = headers.get("Cookie", "")
         if default_cookie:
-            accounts.append({"name": "default_account", "cookie": default_cookie})
+            accounts.append({"name": "default_account", "cookie": default_cookie, "communities": list(default_communities)})
 
     return accounts
 
-def is_instagram_task(quest_data):
-    """Check if the quest is an Instagram task based on name or description."""
-    name = quest_data.get("name", "").lower()
-    if "instagram" in name:
-        return True
-    
-    # Check description for instagram links or mentions
-    desc = quest_data.get("description", {})
-    content = desc.get("content", [])
-    for item in content:
-        if item.get("type") == "paragraph":
-            for sub in item.get("content", []):
-                text = sub.get("text", "").lower()
-                if "instagram" in text:
-                    return True
-                if sub.get("marks"):
-                    for mark in sub.get("marks", []):
-                        if mark.get("type") == "link":
-                            href = mark.get("attrs", {}).get("href", "")
-                            if "instagram.com" in href:
-                                return True
-    return False
-
-def is_reddit_task(quest_data):
-    """Check if the quest is a Reddit task based on name or description."""
-    name = quest_data.get("name", "").lower()
-    if "reddit" in name:
-        return True
-    
-    # Check description for reddit links or mentions
-    desc = quest_data.get("description", {})
-    content = desc.get("content", [])
-    for item in content:
-        if item.get("type") == "paragraph":
-            for sub in item.get("content", []):
-                text = sub.get("text", "").lower()
-                if "reddit" in text:
-                    return True
-                if sub.get("marks"):
-                    for mark in sub.get("marks", []):
-                        if mark.get("type") == "link":
-                            href = mark.get("attrs", {}).get("href", "")
-                            if "reddit.com" in href:
-                                return True
-    return False
-
-def extract_reddit_links(quest_data):
-    """Extract Reddit links from the quest description."""
-    links = []
-    desc = quest_data.get("description", {})
-    content = desc.get("content", [])
-    
-    def extract_from_content(content_list):
-        """Recursively extract links from content list."""
-        for item in content_list:
-            item_type = item.get("type")
-            
-            # Handle paragraphs
-            if item_type == "paragraph":
-                for sub in item.get("content", []):
-                    if sub.get("marks"):
-                        for mark in sub.get("marks", []):
-                            if mark.get("type") == "link":
-                                href = mark.get("attrs", {}).get("href", "")
-                                if "reddit.com" in href:
-                                    links.append(href)
-                    # Also check for nested content
-                    if sub.get("content"):
-                        extract_from_content(sub.get("content", []))
-            
-            # Handle lists (orderedList, bulletList)
-            elif item_type in ["orderedList", "bulletList"]:
-                for list_item in item.get("content", []):
-                    if list_item.get("type") == "listItem":
-                        extract_from_content(list_item.get("content", []))
-            
-            # Handle other nested content
-            elif item.get("content"):
-                extract_from_content(item.get("content", []))
-    
-    extract_from_content(content)
-    return links
-
-def is_x_url_task(quest_data):
-    """Check if the quest is an X/Twitter URL task based on description content."""
-    # Check task type first
-    tasks = quest_data.get("tasks", [])
-    has_url_task = any(task.get("type") == "url" for task in tasks)
-    if not has_url_task:
-        return False
-    
-    # Check description for X/Twitter URL submission keywords
-    desc = quest_data.get("description", {})
-    content = desc.get("content", [])
-    
-    def check_content(content_list):
-        for item in content_list:
-            if item.get("type") == "paragraph":
-                for sub in item.get("content", []):
-                    text = sub.get("text", "").lower()
-                    # Look for keywords indicating URL submission for X/Twitter
-                    if any(keyword in text for keyword in [
-                        "post the url to your comment",
-                        "submit the url",
-                        "x comment",
-                        "twitter comment",
-                        "comment url",
-                        "url to your comment"
-                    ]):
-                        return True
-                    if sub.get("content"):
-                        if check_content(sub.get("content", [])):
-                            return True
-            elif item.get("content"):
-                if check_content(item.get("content", [])):
-                    return True
-        return False
-    
-    return check_content(content)
+# Put in an account's inbox to have it look at every quest on its boards again
+RESCAN = object()
+# account name -> callable putting RESCAN in that account's inbox (from any thread)
+account_rescans = {}
+
+def request_rescan(account_name):
+    """Have an account match its whole boards again soon, e.g. after links were stored for it."""
+    rescan = account_rescans.get(account_name)
+    if rescan is not None:
+        rescan()
+
+# Uploaded link mappings (SQLite, with an in-memory read index); new
+# mappings rescan their account's boards so quests already seen get matched
+link_store = LinkStore(on_change=request_rescan)
+
+# Task handlers indexed by task type; TASK_HANDLERS picks which kinds run
+task_registry = HandlerRegistry(default_handlers(link_store), enabled=parse_enabled(TASK_HANDLERS))
+
+# Detection-to-claim timings of every claim, see latency.CLAIM_STAGES
+claim_latency = LatencyTracker()
+
+def build_claim_payload(plan):
+    """Build the claim POST body for a ClaimPlan from its handler's template."""
+    handler = task_registry.get(plan.kind)
+    if handler is None:
+        return {"taskValues": [{"taskId": plan.task_id, "type": plan.task_type}]}
+    fixed, variable = handler.template
+    value = {"taskId": plan.task_id, **fixed}
+    if variable:
+        value[variable[0]] = getattr(plan, variable[1])
+    return {"taskValues": [value]}
+
+def claim_body(plan):
+    """Serialized claim POST body for a ClaimPlan."""
+    return fast_json.dumpb(build_claim_payload(plan))
+
+def describe_plan(plan):
+    """Short log description of what a ClaimPlan submits."""
+    handler = task_registry.get(plan.kind)
+    return handler.describe(plan) if handler else plan.kind
+
+def claim_label(plan):
+    handler = task_registry.get(plan.kind)
+    return handler.label if handler else ""
+
+def record_claim_latency(account_name, plan, detected_at, matched_at, sent_at, responded_at):
+    """Record and log where the time went between detecting a task and its claim response."""
+    stages = claim_latency.record(plan.kind, detected_at, matched_at, sent_at, responded_at)
+    for stage, ms in stages.items():
+        metrics.CLAIM_STAGE_SECONDS.observe(ms / 1000, kind=plan.kind, stage=stage)
+    logging.info(
+        "[%s] Claim latency (%s): detect %.1fms, dispatch %.1fms, response %.1fms, total %.1fms",
+        account_name, plan.kind, stages["detect"], stages["dispatch"], stages["response"], stages["total"],
+    )
+
+def report_claim_result(account_name, quest_title, frontend_url_local, plan, status_code=None, text="", error=None):
+    """Log and notify the outcome of a claim, and drop the used link mapping on success."""
+    label = claim_label(plan)
+    outcome = "error" if error is not None else "claimed" if status_code == 200 else "failed"
+    metrics.CLAIMS.inc(account=account_name, kind=plan.kind, outcome=outcome)
+    if error is not None:
+        msg = f"❌ [{account_name}] Error claiming{label} {quest_title}: {error}\nURL: {frontend_url_local}"
+        logging.error(msg)
+        send_telegram_message(msg, PRIORITY_CLAIM)
+    elif status_code == 200:
+        msg = f"✅ [{account_name}] Claimed{label}: {quest_title}"
+        logging.info(msg)
+        print(msg)
+        send_telegram_message(msg, PRIORITY_CLAIM)
+
+        # Clean up after a successful claim (e.g. drop the used link mapping)
+        task_registry.get(plan.kind).on_claimed(account_name, plan)
+    else:
+        msg = f"❌ [{account_name}] Failed to claim{label}: {quest_title} → {status_code} → {text}\nURL: {frontend_url_local}"
+        logging.warning(msg)
+        send_telegram_message(msg, PRIORITY_CLAIM)
 
-def extract_x_links(quest_data):
-    """Extract X/Twitter links from the quest description."""
-    links = []
-    desc = quest_data.get("description", {})
-    content = desc.get("content", [])
-    
-    def extract_from_content(content_list):
-        """Recursively extract X/Twitter links from content list."""
-        for item in content_list:
-            item_type = item.get("type")
-            
-            # Handle tweet embeds
-            if item_type == "tweet":
-                src = item.get("attrs", {}).get("src", "")
-                if src and ("x.com" in src or "twitter.com" in src):
-                    links.append(src)
-            
-            # Handle paragraphs
-            elif item_type == "paragraph":
-                for sub in item.get("content", []):
-                    if sub.get("marks"):
-                        for mark in sub.get("marks", []):
-                            if mark.get("type") == "link":
-                                href = mark.get("attrs", {}).get("href", "")
-                                if "x.com" in href or "twitter.com" in href:
-                                    links.append(href)
-                    # Also check for nested content
-                    if sub.get("content"):
-                        extract_from_content(sub.get("content", []))
-            
-            # Handle lists (orderedList, bulletList)
-            elif item_type in ["orderedList", "bulletList"]:
-                for list_item in item.get("content", []):
-                    if list_item.get("type") == "listItem":
-                        extract_from_content(list_item.get("content", []))
-            
-            # Handle other nested content
-            elif item.get("content"):
-                extract_from_content(item.get("content", []))
-    
-    extract_from_content(content)
-    return links
-
-def extract_instagram_links(quest_data):
-    """Extract Instagram links from the quest description."""
-    links = []
-    desc = quest_data.get("description", {})
-    content = desc.get("content", [])
-    
-    def extract_from_content(content_list):
-        """Recursively extract links from content list."""
-        for item in content_list:
-            item_type = item.get("type")
-            
-            # Handle paragraphs
-            if item_type == "paragraph":
-                for sub in item.get("content", []):
-                    if sub.get("marks"):
-                        for mark in sub.get("marks", []):
-                            if mark.get("type") == "link":
-                                href = mark.get("attrs", {}).get("href", "")
-                                if "instagram.com" in href:
-                                    links.append(href)
-                    # Also check for nested content
-                    if sub.get("content"):
-                        extract_from_content(sub.get("content", []))
-            
-            # Handle lists (orderedList, bulletList)
-            elif item_type in ["orderedList", "bulletList"]:
-                for list_item in item.get("content", []):
-                    if list_item.get("type") == "listItem":
-                        extract_from_content(list_item.get("content", []))
-            
-            # Handle other nested content
-            elif item.get("content"):
-                extract_from_content(item.get("content", []))
-    
-    extract_from_content(content)
-    return links
-
-def check_match(account_name, ig_link):
-    """Check if the Instagram link matches any stored link for the account and return URLs if found."""
-    logging.info(f"Checking match for {account_name} and link {ig_link}")
-    json_path = f'uploads/{account_name}/links.json'
-    if os.path.exists(json_path):
-        with open(json_path) as f:
-            links = json.load(f)
-            logging.info(f"Found links for {account_name}: {links}")
-        if ig_link in links:
-            return links[ig_link]  # Return the list of URLs [url1, url2]
-    return None
-
-def check_reddit_match(account_name, reddit_link):
-    """Check if the Reddit link matches any stored link for the account and return URLs if found."""
-    logging.info(f"Checking Reddit match for {account_name} and link {reddit_link}")
-    json_path = f'uploads/{account_name}/reddit_links.json'
-    if os.path.exists(json_path):
-        with open(json_path) as f:
-            links = json.load(f)
-            logging.info(f"Found Reddit links for {account_name}: {links}")
-        if reddit_link in links:
-            return links[reddit_link]  # Return the list of URLs (usually just one for Reddit)
-    return None
-
-def check_x_match(account_name, x_link):
-    """Check if the X/Twitter link matches any stored link for the account and return comment URL if found."""
-    logging.info(f"Checking X match for {account_name} and link {x_link}")
-    json_path = f'uploads/{account_name}/x_links.json'
-    if os.path.exists(json_path):
-        with open(json_path) as f:
-            links = json.load(f)
-            logging.info(f"Found X links for {account_name}: {links}")
-        
-        # Normalize the quest link by removing URL parameters
-        def normalize_x_url(url):
-            """Remove URL parameters and normalize X/Twitter URLs for comparison."""
-            if '?' in url:
-                url = url.split('?')[0]
-            # Normalize case for domain
-            url = url.lower().replace('twitter.com', 'x.com')
-            return url
-        
-        normalized_quest_link = normalize_x_url(x_link)
-        logging.info(f"Normalized quest link: {normalized_quest_link}")
-        
-        # Check for matches by normalizing stored URLs too
-        for stored_link, comment_url in links.items():
-            normalized_stored_link = normalize_x_url(stored_link)
-            logging.info(f"Comparing '{normalized_quest_link}' with '{normalized_stored_link}'")
-            if normalized_quest_link == normalized_stored_link:
-                logging.info(f"Found match! Quest link '{x_link}' matches stored link '{stored_link}'")
-                return comment_url
-    return None
-
-def remove_claimed_link(account_name, instagram_link):
-    """Remove a claimed Instagram link and its URLs from the JSON file."""
-    json_path = f'uploads/{account_name}/links.json'
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, 'r') as f:
-                links = json.load(f)
-            
-            if instagram_link in links:
-                del links[instagram_link]
-                with open(json_path, 'w') as f:
-                    json.dump(links, f, indent=2)
-                logging.info("[%s] Removed claimed link from JSON: %s", account_name, instagram_link)
-            else:
-                logging.warning("[%s] Link not found in JSON for removal: %s", account_name, instagram_link)
-        except Exception as e:
-            logging.error("[%s] Error removing link from JSON: %s", account_name, e)
+def prepare_claim(session, community_info, quest_id, plan):
+    """Build the ready-to-send claim request for a ClaimPlan."""
+    claim_url = community_info.claim_url_template.format(quest_id=quest_id)
+    return session.prepare_post(claim_url, claim_body(plan), community_info.headers)
 
-def remove_claimed_reddit_link(account_name, reddit_link):
-    """Remove a claimed Reddit link and its URLs from the JSON file."""
-    json_path = f'uploads/{account_name}/reddit_links.json'
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, 'r') as f:
-                links = json.load(f)
-            
-            if reddit_link in links:
-                del links[reddit_link]
-                with open(json_path, 'w') as f:
-                    json.dump(links, f, indent=2)
-                logging.info("[%s] Removed claimed Reddit link from JSON: %s", account_name, reddit_link)
-            else:
-                logging.warning("[%s] Reddit link not found in JSON for removal: %s", account_name, reddit_link)
-        except Exception as e:
-            logging.error("[%s] Error removing Reddit link from JSON: %s", account_name, e)
+# Every account's claims go through one bounded, retrying dispatcher per engine
+claim_dispatcher = ClaimDispatcher()
+async_claim_dispatcher = AsyncClaimDispatcher()
 
-def remove_claimed_x_link(account_name, x_link):
-    """Remove a claimed X/Twitter link from the JSON file."""
-    json_path = f'uploads/{account_name}/x_links.json'
-    if os.path.exists(json_path):
-        try:
-            with open(json_path, 'r') as f:
-                links = json.load(f)
-            
-            # Normalize the quest link by removing URL parameters
-            def normalize_x_url(url):
-                """Remove URL parameters and normalize X/Twitter URLs for comparison."""
-                if '?' in url:
-                    url = url.split('?')[0]
-                # Normalize case for domain
-                url = url.lower().replace('twitter.com', 'x.com')
-                return url
-            
-            normalized_quest_link = normalize_x_url(x_link)
-            
-            # Find the actual stored link that matches this quest link
-            link_to_remove = None
-            for stored_link in links.keys():
-                if normalize_x_url(stored_link) == normalized_quest_link:
-                    link_to_remove = stored_link
-                    break
-            
-            if link_to_remove:
-                del links[link_to_remove]
-                with open(json_path, 'w') as f:
-                    json.dump(links, f, indent=2)
-                logging.info("[%s] Removed claimed X link from JSON: %s (matched with quest link: %s)", account_name, link_to_remove, x_link)
-            else:
-                logging.warning("[%s] X link not found in JSON for removal: %s", account_name, x_link)
-        except Exception as e:
-            logging.error("[%s] Error removing X link from JSON: %s", account_name, e)
-
-
-def claim_and_notify_for_account(session, account_name, box_id, quest_id, task_id, quest_title, frontend_url_local, task_type, file_urls=None, instagram_link=None):
-    """Use provided session to claim and notify; include account_name in messages."""
-    claim_url = claim_url_template.format(quest_id=quest_id)
-    if task_type == "tweetReact":
-        payload = {"taskValues": [{"taskId": task_id, "type": "tweetReact", "tweetUrl": ""}]}
-    elif task_type == "file" and file_urls:
-        # For Instagram tasks with uploaded images
-        payload = {"taskValues": [{"taskId": task_id, "fileUrls": file_urls, "type": "file"}]}
-    elif task_type == "file":
-        payload = {"taskValues": [{"taskId": task_id, "type": "file", "files": []}]}
+def finish_claim(account_name, quest_id, quest_title, frontend_url_local, plan, unmark_seen, res, error, transient, recurring=False):
+    """Report a claim's final outcome.
+
+    A claim given up on after transient failures is unmarked so it's tried
+    again, and so is a claimed recurring quest: its next round shows up as
+    a cooldown in the account's view and gets a timer.
+    """
+    if error is not None:
+        report_claim_result(account_name, quest_title, frontend_url_local, plan, error=error)
     else:
-        payload = {"taskValues": [{"taskId": task_id, "type": task_type}]}
-    try:
-        res = session.post(claim_url, json=payload, timeout=10)
-        if res.status_code == 200:
-            msg = f"✅ [{account_name}] Claimed: {quest_title}"
-            logging.info(msg)
-            print
-            send_telegram_message(msg)
-            
-            # Clean up the used Instagram link from JSON after successful claim
-            if instagram_link and file_urls:
-                remove_claimed_link(account_name, instagram_link)
-        else:
-            msg = f"❌ [{account_name}] Failed to claim: {quest_title} → {res.status_code} → {res.text}\nURL: {frontend_url_local}"
-            logging.warning(msg)
-            send_telegram_message(msg)
-    except Exception as e:
-        msg = f"❌ [{account_name}] Error claiming {quest_title}: {e}\nURL: {frontend_url_local}"
-        logging.exception(msg)
-        send_telegram_message(msg)
-
-def claim_reddit_task(session, account_name, box_id, quest_id, task_id, quest_title, frontend_url_local, file_urls, reddit_link):
-    """Specific function to claim Reddit tasks with file URLs."""
-    claim_url = claim_url_template.format(quest_id=quest_id)
-    payload = {"taskValues": [{"taskId": task_id, "fileUrls": file_urls, "type": "file"}]}
-    
-    try:
-        res = session.post(claim_url, json=payload, timeout=10)
-        if res.status_code == 200:
-            msg = f"✅ [{account_name}] Claimed Reddit task: {quest_title}"
-            logging.info(msg)
-            print(msg)
-            send_telegram_message(msg)
-            
-            # Clean up the used Reddit link from JSON after successful claim
-            remove_claimed_reddit_link(account_name, reddit_link)
-        else:
-            msg = f"❌ [{account_name}] Failed to claim Reddit task: {quest_title} → {res.status_code} → {res.text}\nURL: {frontend_url_local}"
-            logging.warning(msg)
-            send_telegram_message(msg)
-    except Exception as e:
-        msg = f"❌ [{account_name}] Error claiming Reddit task {quest_title}: {e}\nURL: {frontend_url_local}"
-        logging.exception(msg)
-        send_telegram_message(msg)
-
-def claim_x_task(session, account_name, box_id, quest_id, task_id, quest_title, frontend_url_local, comment_url, x_link):
-    """Specific function to claim X/Twitter URL tasks with comment URL."""
-    claim_url = claim_url_template.format(quest_id=quest_id)
-    payload = {"taskValues": [{"taskId": task_id, "value": comment_url, "type": "url"}]}
-    
-    try:
-        res = session.post(claim_url, json=payload, timeout=10)
-        if res.status_code == 200:
-            msg = f"✅ [{account_name}] Claimed X task: {quest_title}"
-            logging.info(msg)
-            print(msg)
-            send_telegram_message(msg)
-            
-            # Clean up the used X link from JSON after successful claim
-            remove_claimed_x_link(account_name, x_link)
-        else:
-            msg = f"❌ [{account_name}] Failed to claim X task: {quest_title} → {res.status_code} → {res.text}\nURL: {frontend_url_local}"
-            logging.warning(msg)
-            send_telegram_message(msg)
-    except Exception as e:
-        msg = f"❌ [{account_name}] Error claiming X task {quest_title}: {e}\nURL: {frontend_url_local}"
-        logging.exception(msg)
-        send_telegram_message(msg)
+        report_claim_result(account_name, quest_title, frontend_url_local, plan, res.status_code, res.text)
+    if transient or (recurring and res is not None and res.status_code == 200):
+        unmark_seen(quest_id)
+
+def plan_priority(quest_data, plan):
+    """Dispatch priority of a claim: its quest's reward per unit of the handler's cost."""
+    return claim_priority(quest_data, task_registry.get(plan.kind).cost)
+
+def dispatch_claim(session, account_name, quest_id, prepared, quest_title, frontend_url_local, plan, detected_at, matched_at, unmark_seen, priority=0.0, recurring=False):
+    """Queue a prepared claim; latency, logging and notifications come after the response.
+
+    Higher-priority claims go out first when claims are waiting. Returns
+    False if this account is already claiming the quest.
+    """
+    recorded = False
+
+    def send():
+        nonlocal recorded
+        sent_at = time.monotonic()
+        try:
+            res = session.send_prepared(prepared, timeout=10)
+        except Exception:
+            transport.rewarm(session)
+            raise
+        if not recorded:
+            # Latency is about the first attempt; retries show up in zealy_claim_retries_total
+            recorded = True
+            record_claim_latency(account_name, plan, detected_at, matched_at, sent_at, time.monotonic())
+        return res
+
+    def finish(res, error, transient):
+        finish_claim(account_name, quest_id, quest_title, frontend_url_local, plan, unmark_seen, res, error, transient, recurring)
+
+    return claim_dispatcher.submit((account_name, quest_id), send, finish, priority)
+
+# Quests in cooldown wake their account's loop when they become claimable
+cooldown_timers = TimerHeap("cooldowns")
+async_cooldown_timers = AsyncTimers()
+
+def schedule_wake(timers, put, account_name, feed, item, wait, replace=False):
+    """Put a QuestWake for item in the account's inbox when its cooldown is about to end.
+
+    Far-off cooldowns wake COOLDOWN_WAKE_LEAD early to re-fetch the quest
+    first; one ending within the lead wakes exactly on time to claim item's
+    quest_data as is. Unless replace, an earlier pending wake is kept, so
+    re-reading a relative retryAfter on every rescan can't push it back.
+    """
+    if wait > MAX_COOLDOWN_WAIT:
+        return
+    refresh = wait > COOLDOWN_WAKE_LEAD
+
+    def wake():
+        metrics.COOLDOWN_WAKES.inc(stage="refresh" if refresh else "claim")
+        put(QuestWake(feed, item._replace(detected_at=time.monotonic()), refresh))
+
+    if timers.schedule((account_name, item.quest_id), wake_at(wait, refresh), wake, earliest=not replace):
+        logging.info("[%s] %s is in cooldown for %.1fs, waking then", account_name, item.title, wait)
 
 
 @app.route('/')
@@ -572,11 +327,30 @@ def index():
         Comment URL: <input type="text" name="comment_url" required><br>
         <input type="submit" value="Upload X Link">
     </form>
+    
+    <h2>Bulk Import</h2>
+    <form action="/import" method="post" enctype="multipart/form-data">
+        ZIP with manifest.csv (account,platform,link,files,comment_url) and its files: <input type="file" name="archive" accept=".zip" required><br>
+        <input type="submit" value="Import">
+    </form>
     </body>
     </html>
     '''
     return render_template_string(html)
 
+# Uploads run as background jobs; the routes only read the files and queue them.
+# Content uploaded before by the same account reuses its file URL.
+upload_cache = UploadCache()
+upload_jobs = UploadJobs(link_store, lambda account_name: getattr(sessions.get(account_name), "upload", None), file_upload, upload_cache)
+
+def read_upload(file_storage):
+    """Read a posted file into memory before its request goes away."""
+    return UploadFile(file_storage.filename, file_storage.read(), file_storage.mimetype)
+
+def upload_accepted(job):
+    body = {"job_id": job.id, "status_url": f"/upload/jobs/{job.id}", "files": job.files_total}
+    return Response(fast_json.dumps(body), status=202, mimetype="application/json")
+
 @app.route('/upload', methods=['POST'])
 def upload():
     account_name = request.form['account_name']
@@ -584,43 +358,13 @@ def upload():
     image1 = request.files['image1']
     image2 = request.files['image2']
     
-    # Get session for the account
-    session = sessions.get(account_name)
-    if not session:
+    if account_name not in sessions:
         return f'Session for account {account_name} not found. Please ensure the bot is running and monitoring this account.'
     
-    # Upload images using the same session
-    files_url = f"https://api-v1.zealy.io/files"
-    
-    # Upload image1
-    files = {'file': (image1.filename, image1.stream, image1.mimetype)}
-    response = session.post(files_url, files=files)
-    if response.status_code != 200:
-        return f'Failed to upload image1: {response.text}'
-    url1 = response.json()['url']
-    logging.info("[%s] Uploaded image1: %s -> %s", account_name, image1.filename, url1)
-    
-    # Upload image2
-    files = {'file': (image2.filename, image2.stream, image2.mimetype)}
-    response = session.post(files_url, files=files)
-    if response.status_code != 200:
-        return f'Failed to upload image2: {response.text}'
-    url2 = response.json()['url']
-    logging.info("[%s] Uploaded image2: %s -> %s", account_name, image2.filename, url2)
-    
-    # Save links and URLs
-    json_path = f'uploads/{account_name}/links.json'
-    os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    if os.path.exists(json_path):
-        with open(json_path) as f:
-            links = json.load(f)
-    else:
-        links = {}
-    links[link] = [url1, url2]
-    with open(json_path, 'w') as f:
-        json.dump(links, f)
-    
-    return f'Uploaded for {account_name}: {link} with URLs {url1}, {url2}'
+    # Both images upload in parallel; the link is stored once both are in
+    job = upload_jobs.submit([UploadItem(account_name, "instagram", link, [read_upload(image1), read_upload(image2)])])
+    logging.info("[%s] Queued Instagram upload job %s for %s", account_name, job.id, link)
+    return upload_accepted(job)
 
 @app.route('/upload_reddit', methods=['POST'])
 def upload_reddit():
@@ -628,35 +372,83 @@ def upload_reddit():
     link = request.form['link']
     image = request.files['image']
     
-    # Get session for the account
-    session = sessions.get(account_name)
-    if not session:
+    if account_name not in sessions:
         return f'Session for account {account_name} not found. Please ensure the bot is running and monitoring this account.'
     
-    # Upload image using the same session
-    files_url = f"https://api-v1.zealy.io/files"
-    
-    # Upload screenshot
-    files = {'file': (image.filename, image.stream, image.mimetype)}
-    response = session.post(files_url, files=files)
-    if response.status_code != 200:
-        return f'Failed to upload screenshot: {response.text}'
-    url = response.json()['url']
-    logging.info("[%s] Uploaded Reddit screenshot: %s -> %s", account_name, image.filename, url)
-    
-    # Save Reddit links and URLs
-    json_path = f'uploads/{account_name}/reddit_links.json'
-    os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    if os.path.exists(json_path):
-        with open(json_path) as f:
-            links = json.load(f)
-    else:
-        links = {}
-    links[link] = [url]  # Reddit tasks usually need only one screenshot
-    with open(json_path, 'w') as f:
-        json.dump(links, f)
-    
-    return f'Uploaded Reddit for {account_name}: {link} with URL {url}'
+    # Reddit tasks usually need only one screenshot
+    job = upload_jobs.submit([UploadItem(account_name, "reddit", link, [read_upload(image)])])
+    logging.info("[%s] Queued Reddit upload job %s for %s", account_name, job.id, link)
+    return upload_accepted(job)
+
+@app.route('/upload_batch', methods=['POST'])
+def upload_batch():
+    """Many links for one account and platform in one job.
+
+    Form fields: account_name, platform (instagram or reddit) and one
+    ``link`` per mapping; the files for the i-th link (0-based) are posted
+    as ``files_<i>``.
+    """
+    account_name = request.form['account_name']
+    platform = request.form['platform']
+    links = request.form.getlist('link')
+    if platform not in ("instagram", "reddit"):
+        return f'Unknown platform for file uploads: {platform}', 400
+    if account_name not in sessions:
+        return f'Session for account {account_name} not found. Please ensure the bot is running and monitoring this account.'
+    items = []
+    for i, link in enumerate(links):
+        files = [read_upload(f) for f in request.files.getlist(f'files_{i}')]
+        if not files:
+            return f'No files_{i} posted for link {link}', 400
+        items.append(UploadItem(account_name, platform, link, files))
+    if not items:
+        return 'No links posted', 400
+    job = upload_jobs.submit(items)
+    logging.info("[%s] Queued %s batch upload job %s: %d links, %d files", account_name, platform, job.id, len(items), job.files_total)
+    return upload_accepted(job)
+
+@app.route('/import', methods=['POST'])
+def import_mappings():
+    """Bulk import of Instagram, Reddit and X mappings for any accounts, as one upload job.
+
+    Either an ``archive`` ZIP holding manifest.csv or manifest.jsonl next to
+    the files it names, or a multipart post of a ``manifest`` file plus the
+    files (matched by filename or field name). An optional ``accounts``
+    field (comma-separated) limits the import to those accounts. The job's
+    items are the manifest rows, each with its own result.
+    """
+    if request.content_length and request.content_length > IMPORT_MAX_BYTES:
+        return f'Import larger than IMPORT_MAX_BYTES ({IMPORT_MAX_BYTES})', 413
+    try:
+        if 'archive' in request.files:
+            manifest_name, manifest, files = read_zip(request.files['archive'].read())
+        elif 'manifest' in request.files:
+            manifest_file = request.files['manifest']
+            manifest_name = manifest_file.filename or 'manifest.csv'
+            manifest = manifest_file.read()
+            files = {}
+            for field, f in request.files.items(multi=True):
+                if field != 'manifest':
+                    files[field] = files[f.filename] = f.read()
+        else:
+            return 'Post an archive (ZIP) or a manifest file', 400
+        rows = parse_manifest(manifest_name, manifest)
+    except BulkImportError as e:
+        return str(e), 400
+    accounts = request.form.get('accounts')
+    items, errors = build_items(rows, files, {name.strip() for name in accounts.split(',')} if accounts else None)
+    if not items:
+        return 'No rows to import', 400
+    job = upload_jobs.submit(items, errors)
+    logging.info("Queued import job %s: %d rows (%d rejected), %d files", job.id, len(items), len(errors), job.files_total)
+    return upload_accepted(job)
+
+@app.route('/upload/jobs/<job_id>')
+def upload_job_status(job_id):
+    job = upload_jobs.get(job_id)
+    if job is None:
+        return Response(fast_json.dumps({"error": "unknown job"}), status=404, mimetype="application/json")
+    return Response(fast_json.dumps(job.to_dict()), mimetype="application/json")
 
 @app.route('/upload_x', methods=['POST'])
 def upload_x():
@@ -665,162 +457,367 @@ def upload_x():
     comment_url = request.form['comment_url']
     
     # Save X links and comment URLs (no file upload needed for X tasks)
-    json_path = f'uploads/{account_name}/x_links.json'
-    os.makedirs(os.path.dirname(json_path), exist_ok=True)
-    if os.path.exists(json_path):
-        with open(json_path) as f:
-            links = json.load(f)
-    else:
-        links = {}
-    links[x_link] = comment_url  # Map X tweet link to comment URL
-    with open(json_path, 'w') as f:
-        json.dump(links, f)
+    link_store.put(account_name, "x", x_link, comment_url)  # Map X tweet link to comment URL
     
     logging.info("[%s] Stored X link mapping: %s -> %s", account_name, x_link, comment_url)
     return f'Uploaded X link mapping for {account_name}: {x_link} -> {comment_url}'
 
+# Per-account detail caches (quests the shared feed can't vouch for) and the
+# async engine's loop, read by /metrics
+account_detail_caches = {}
+engine_loop = None
+
+def collect_runtime_metrics():
+    """Refresh the gauges that are read rather than counted, right before a scrape."""
+    caches = [(f"feed:{slug}", feed.detail_cache) for slug, feed in list(feeds.items())]
+    caches += [(f"account:{name}", cache) for name, cache in list(account_detail_caches.items())]
+    for name, cache in caches:
+        metrics.DETAIL_CACHE_SIZE.set(len(cache), cache=name)
+    metrics.TELEGRAM_QUEUE_DEPTH.set(notifier.depth())
+    dispatcher = async_claim_dispatcher if ENGINE == "async" else claim_dispatcher
+    metrics.CLAIM_QUEUE_DEPTH.set(dispatcher.depth())
+    metrics.CLAIMS_IN_FLIGHT.set(dispatcher.in_flight())
+    metrics.COOLDOWN_TIMERS.set(len(async_cooldown_timers if ENGINE == "async" else cooldown_timers))
+    metrics.THREADS.set(threading.active_count())
+    if engine_loop is not None and not engine_loop.is_closed():
+        metrics.ASYNC_TASKS.set(len(asyncio.all_tasks(engine_loop)))
+
+metrics.REGISTRY.add_collector(collect_runtime_metrics)
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+# Account threads of the threaded engine, read by /health
+monitor_threads = []
+
+@app.route('/health')
+def health():
+    """Liveness of this process's accounts and feeds, as JSON."""
+    body = {
+        "pid": os.getpid(),
+        "engine": ENGINE,
+        "accounts": sorted(sessions),
+        "monitors_alive": sum(1 for t in monitor_threads if t.is_alive()) if monitor_threads else None,
+        "feeds": {slug: {"fetches": feed.fetch_count, "unchanged": feed.unchanged_count} for slug, feed in list(feeds.items())},
+        "telegram_queue": notifier.depth(),
+        "threads": threading.active_count(),
+    }
+    return Response(fast_json.dumps(body), mimetype="application/json")
+
+def match_task(account_name, quest_title, quest_data, task):
+    """Decide whether this account can claim a task right now.
+
+    Only the handlers registered for the task's type are consulted (see
+    task_handlers). Returns a ClaimPlan or None; matches are logged by the
+    caller once the claim is on its way.
+    """
+    return task_registry.match(account_name, quest_title, quest_data, task)
+
+# Seen quests per account, persisted in SQLite by a background writer
+seen_store = SeenStore()
+
+def load_seen(account_name):
+    """Load the account's seen quest ids; return (seen_set, mark_seen, unmark_seen)."""
+    seen_local = seen_store.load(account_name)
+
+    def mark_seen(quest_id):
+        seen_local.add(quest_id)
+        seen_store.add(account_name, quest_id)
+
+    def unmark_seen(quest_id):
+        seen_local.discard(quest_id)
+        seen_store.discard(account_name, quest_id)
+
+    return seen_local, mark_seen, unmark_seen
+
+# One shared questboard feed per community, all polled by one scheduler
+feeds = {}
+feeds_lock = threading.Lock()
+feed_scheduler = FeedScheduler()
+
+def announce_new_task(feed, item):
+    """Notify once per community when a new or changed quest shows up on the board."""
+    frontend = feed.community.frontend_url.format(box_id=item.box_id, quest_id=item.quest_id)
+    for task in item.quest_data.get("tasks", []):
+        message = f"[{feed.slug}] Found task: {item.title}\nType: {task.get('type')}\nURL: {frontend}"
+        print(message)
+        logging.info(message)
+        send_telegram_message(message)
+
+def get_feed(slug):
+    """Return the shared CommunityFeed for a community, creating and scheduling it on first use."""
+    with feeds_lock:
+        feed = feeds.get(slug)
+        if feed is None:
+            feed = CommunityFeed(get_community(slug), feed_params, POLL_INTERVAL, on_new_task=announce_new_task)
+            feeds[slug] = feed
+            feed_scheduler.add(feed)
+        return feed
+
+def board_updates(feed, versions, full=False):
+    """Return the items of feed's latest snapshot that changed since this account last looked.
+
+    versions maps community slug -> last snapshot version handled; full=True
+    returns the whole board, stamped as detected now for claim latency.
+    """
+    version, board = feed.latest()
+    since = versions.get(feed.slug, 0)
+    versions[feed.slug] = version
+    if full:
+        now = time.monotonic()
+        return [item._replace(detected_at=now) for item in board]
+    return [item for item in board if item.version > since]
+
 def monitor_account(account):
     """Run the monitoring loop for a single account.
 
-    account: dict with keys 'name' and 'cookie'
+    account: dict with keys 'name', 'cookie' and optionally 'communities'
     """
     account_name = account.get("name")
     print(f"Starting monitor for account: {account_name}")
     account_cookie = account.get("cookie")
     print(f"Using cookie: {account_cookie[:30]}... (length {len(account_cookie)})")
-    session = make_session_with_cookie(account_cookie)
-    sessions[account_name] = session
-    
-    # Load previously seen quests from file
-    seen_file = f'uploads/{account_name}/seen_quests.json'
-    os.makedirs(os.path.dirname(seen_file), exist_ok=True)
-    if os.path.exists(seen_file):
-        with open(seen_file) as f:
-            seen_local = set(json.load(f))
-    else:
-        seen_local = set()
-    
-    def save_seen():
-        with open(seen_file, 'w') as f:
-            json.dump(list(seen_local), f)
-    
-    executor_local = ThreadPoolExecutor(max_workers=MAX_WORKERS)
-    local_fetch_count = 1
+    # One transport per account, shared by all its communities: separate
+    # pools for polling, claims and uploads, opened before the first poll
+    account_transport = make_transport(account_cookie)
+    account_transport.warm_up()
+    sessions[account_name] = account_transport
+    
+    # Load previously seen quests and uploaded links from file
+    seen_local, mark_seen, unmark_seen = load_seen(account_name)
+    link_store.load_account(account_name)
+
+    # Details looked up with this account's own session, for quests whose
+    # shared copy carries the polling account's lock/cooldown status
+    own_detail_cache = account_detail_caches[account_name] = QuestDetailCache(name=f"account:{account_name}")
+
+    def forget_claim(quest_id):
+        # Try the quest again, starting from a fresh look at the account's view
+        unmark_seen(quest_id)
+        own_detail_cache.invalidate(quest_id)
+
+    # Feeds drop themselves in here whenever they publish a new snapshot,
+    # cooldown timers put a QuestWake, new link mappings RESCAN
+    inbox = queue.Queue()
+    account_rescans[account_name] = lambda: inbox.put(RESCAN)
+    account_feeds = [get_feed(slug) for slug in account.get("communities") or default_communities]
+    for feed in account_feeds:
+        feed.register(account_name, account_transport.poll, inbox)
+    versions = {}
+    last_full_pass = time.monotonic()
 
     while True:
         try:
-            logging.info("[%s] Fetching.... Attempt #%d", account_name, local_fetch_count)
-            print(f"[{account_name}] Fetching.... Attempt #{local_fetch_count}")
-            local_fetch_count += 1
-            resp = session.get(api_url, params=params, timeout=10)
-            logging.debug("[%s] Response: %s", account_name, resp.text[:200] + "..." if len(resp.text) > 200 else resp.text)
-            if resp.status_code != 200:
-                logging.warning("[%s] Error fetching questboard: %s", account_name, resp.status_code)
-                time.sleep(POLL_INTERVAL)
-                continue
-
-            data = resp.json()
-            for box in data:
-                box_id = box.get("id")
-                quests = box.get("quests", [])
-
-                for quest in quests:
-                    quest_id = quest.get("id")
-                    quest_title = quest.get("name")
-                    if not quest_id or quest_id in seen_local:
-                        continue
-
-                    detail_url = quest_detail_url_template.format(quest_id=quest_id)
-                    frontend = frontend_url.format(box_id=box_id, quest_id=quest_id)
-                    detail_res = session.get(detail_url, timeout=10)
-                    if detail_res.status_code != 200:
+            # A full pass every BOARD_RESCAN_INTERVAL however busy the inbox is
+            due = last_full_pass + BOARD_RESCAN_INTERVAL - time.monotonic()
+            try:
+                message = inbox.get(timeout=due) if due > 0 else RESCAN
+            except queue.Empty:
+                message = RESCAN
+            wake = message if isinstance(message, QuestWake) else None
+            if message is RESCAN:
+                last_full_pass = time.monotonic()
+                updates = [(feed, board_updates(feed, versions, full=True)) for feed in account_feeds]
+            elif wake:
+                updates = [(wake.feed, [wake.item])]
+            else:
+                updates = [(message, board_updates(message, versions))]
+
+            for feed, items in updates:
+                community_info = feed.community
+                for item in items:
+                    box_id = item.box_id
+                    quest_id = item.quest_id
+                    quest_title = item.title
+                    if quest_id in seen_local:
                         continue
 
-                    quest_data = detail_res.json()
-                    tasks = quest_data.get("tasks", [])
-                    for task in tasks:
-                        task_id = task.get("id")
-                        task_type = task.get("type")
-                        message = f"[{account_name}] Found task: {quest_title}\nType: {task_type}\nURL: {frontend}"
-                        print(message)
-                        logging.info(message)
-                        send_telegram_message(message)
-
-                        if task_type == "tweetReact":
-                            logging.info("[%s] Claiming: %s", account_name, quest_title)
-                            seen_local.add(quest_id)
-                            save_seen()
-                            executor_local.submit(claim_and_notify_for_account, session, account_name, box_id, quest_id, task_id, quest_title, frontend, task_type)
-                        elif task_type == "file" and is_instagram_task(quest_data):
-                            instagram_links = extract_instagram_links(quest_data)
-                            logging.info("[%s] Instagram links found: %s", account_name, instagram_links)
-                            print(f"Instagram links found: {instagram_links}")
-                            if instagram_links:
-                                logging.info("[%s] Instagram task found: %s, links: %s", account_name, quest_title, instagram_links)
-                                for ig_link in instagram_links:
-                                    file_urls = check_match(account_name, ig_link)
-                                    if file_urls:
-                                        logging.info("[%s] Match found for %s, claiming: %s with URLs: %s", account_name, ig_link, quest_title, file_urls)
-                                        seen_local.add(quest_id)
-                                        save_seen()
-                                        executor_local.submit(claim_and_notify_for_account, session, account_name, box_id, quest_id, task_id, quest_title, frontend, task_type, file_urls, ig_link)
-                                        break
-                                else:
-                                    logging.info("[%s] No match for Instagram links: %s", account_name, instagram_links)
-                            else:
-                                logging.info("[%s] File task but no Instagram links: %s", account_name, quest_title)
-                        elif task_type == "file" and is_reddit_task(quest_data):
-                            reddit_links = extract_reddit_links(quest_data)
-                            logging.info("[%s] Reddit links found: %s", account_name, reddit_links)
-                            print(f"Reddit links found: {reddit_links}")
-                            if reddit_links:
-                                logging.info("[%s] Reddit task found: %s, links: %s", account_name, quest_title, reddit_links)
-                                for reddit_link in reddit_links:
-                                    file_urls = check_reddit_match(account_name, reddit_link)
-                                    if file_urls:
-                                        logging.info("[%s] Match found for %s, claiming: %s with URLs: %s", account_name, reddit_link, quest_title, file_urls)
-                                        seen_local.add(quest_id)
-                                        save_seen()
-                                        executor_local.submit(claim_reddit_task, session, account_name, box_id, quest_id, task_id, quest_title, frontend, file_urls, reddit_link)
-                                        break
-                                else:
-                                    logging.info("[%s] No match for Reddit links: %s", account_name, reddit_links)
-                            else:
-                                logging.info("[%s] File task but no Reddit links: %s", account_name, quest_title)
-                        elif task_type == "url" and is_x_url_task(quest_data):
-                            x_links = extract_x_links(quest_data)
-                            logging.info("[%s] X links found: %s", account_name, x_links)
-                            print(f"X links found: {x_links}")
-                            if x_links:
-                                logging.info("[%s] X task found: %s, links: %s", account_name, quest_title, x_links)
-                                for x_link in x_links:
-                                    comment_url = check_x_match(account_name, x_link)
-                                    if comment_url:
-                                        logging.info("[%s] Match found for %s, claiming: %s with comment URL: %s", account_name, x_link, quest_title, comment_url)
-                                        seen_local.add(quest_id)
-                                        save_seen()
-                                        executor_local.submit(claim_x_task, session, account_name, box_id, quest_id, task_id, quest_title, frontend, comment_url, x_link)
-                                        break
-                                else:
-                                    logging.info("[%s] No match for X links: %s", account_name, x_links)
-                            else:
-                                logging.info("[%s] URL task but no X links: %s", account_name, quest_title)
-                        else:
-                            logging.info("[%s] Non-tweetReact task: %s", account_name, quest_title)
-
+                    frontend = community_info.frontend_url.format(box_id=box_id, quest_id=quest_id)
+                    quest_data = item.quest_data
+                    checked = wake is None or wake.refresh
+                    # A recurring quest's cooldown only shows in the account's own view
+                    if checked and (wake or needs_account_view(quest_data) or is_recurring(quest_data)):
+                        # Woken just before a cooldown ends: always a fresh look
+                        quest_data = None if wake else own_detail_cache.get(quest_id, item.stamp)
+                        if quest_data is None:
+                            detail_url = community_info.quest_detail_url_template.format(quest_id=quest_id)
+                            detail_res = feed.get(account_transport.poll, detail_url)
+                            metrics.DETAIL_FETCHES.inc(community=feed.slug, scope="account", status=detail_res.status_code)
+                            if detail_res.status_code != 200:
+                                continue
+                            quest_data = fast_json.decode_quest(detail_res.content)
+                            own_detail_cache.put(quest_id, item.stamp, quest_data)
+                    if checked:
+                        wait = claimable_in(quest_data)
+                        if wait is None:
+                            continue
+                        if wait > 0:
+                            schedule_wake(cooldown_timers, inbox.put, account_name, feed, item._replace(quest_data=quest_data), wait, replace=wake is not None)
+                            continue
+
+                    for task in quest_data.get("tasks", []):
+                        classify_started = time.monotonic()
+                        plan = match_task(account_name, quest_title, quest_data, task)
+                        metrics.CLASSIFY_SECONDS.observe(time.monotonic() - classify_started, account=account_name)
+                        if plan is None:
+                            continue
+                        # Claim first: the request goes out before any logging
+                        matched_at = time.monotonic()
+                        prepared = prepare_claim(account_transport.claim, community_info, quest_id, plan)
+                        # Seen before the dispatcher can fail it and unmark it again
+                        mark_seen(quest_id)
+                        if not dispatch_claim(account_transport.claim, account_name, quest_id, prepared, quest_title, frontend, plan, item.detected_at, matched_at, forget_claim, plan_priority(quest_data, plan), is_recurring(quest_data)):
+                            continue
+                        logging.info("[%s] Claiming%s: %s (%s)", account_name, claim_label(plan), quest_title, describe_plan(plan))
 
         except Exception as e:
             logging.exception("[%s] General error: %s", account_name, e)
-            send_telegram_message(f"[{account_name}] General error: {e}")
+            send_telegram_message(f"[{account_name}] General error: {e}", PRIORITY_ERROR)
+            time.sleep(POLL_INTERVAL)
+
+async def dispatch_claim_async(feed, account_name, account_headers, quest_id, quest_title, frontend_url_local, plan, detected_at, matched_at, unmark_seen, priority=0.0, recurring=False):
+    """Async counterpart of dispatch_claim for ENGINE=async."""
+    claim_url = feed.community.claim_url_template.format(quest_id=quest_id)
+    headers_local = dict(account_headers, **feed.community.headers, **transport.JSON_HEADERS)
+    body = claim_body(plan)
+    recorded = False
+
+    async def send():
+        nonlocal recorded
+        sent_at = time.monotonic()
+        res = await async_http.request(feed.client, feed.limiter, "POST", claim_url, content=body, headers=headers_local)
+        if not recorded:
+            recorded = True
+            record_claim_latency(account_name, plan, detected_at, matched_at, sent_at, time.monotonic())
+        return res
+
+    async def finish(res, error, transient):
+        # Reporting touches the link store and Telegram, keep it off the event loop
+        await asyncio.to_thread(finish_claim, account_name, quest_id, quest_title, frontend_url_local, plan, unmark_seen, res, error, transient, recurring)
+
+    return await async_claim_dispatcher.submit((account_name, quest_id), send, finish, priority)
+
+async def monitor_account_async(account, async_feeds):
+    """Async monitoring loop for a single account; see monitor_account."""
+    account_name = account.get("name")
+    account_cookie = account.get("cookie")
+    print(f"Starting async monitor for account: {account_name}")
+    # The upload routes still use blocking requests sessions
+    sessions[account_name] = make_transport(account_cookie)
+    account_headers = dict(headers, Cookie=account_cookie or "")
+
+    seen_local, mark_seen, unmark_seen = load_seen(account_name)
+    link_store.load_account(account_name)
+    own_detail_cache = account_detail_caches[account_name] = QuestDetailCache(name=f"account:{account_name}")
+
+    def forget_claim(quest_id):
+        unmark_seen(quest_id)
+        own_detail_cache.invalidate(quest_id)
+
+    inbox = asyncio.Queue()
+    # Link mappings are stored from web and upload threads
+    loop = asyncio.get_running_loop()
+    account_rescans[account_name] = lambda: loop.call_soon_threadsafe(inbox.put_nowait, RESCAN)
+    account_feeds = [async_feeds[slug] for slug in account.get("communities") or default_communities]
+    for feed in account_feeds:
+        feed.register(account_name, account_headers, inbox)
+    versions = {}
+    last_full_pass = time.monotonic()
 
-        time.sleep(POLL_INTERVAL)
+    while True:
+        try:
+            due = last_full_pass + BOARD_RESCAN_INTERVAL - time.monotonic()
+            try:
+                message = await asyncio.wait_for(inbox.get(), due) if due > 0 else RESCAN
+            except asyncio.TimeoutError:
+                message = RESCAN
+            wake = message if isinstance(message, QuestWake) else None
+            if message is RESCAN:
+                last_full_pass = time.monotonic()
+                updates = [(feed, board_updates(feed, versions, full=True)) for feed in account_feeds]
+            elif wake:
+                updates = [(wake.feed, [wake.item])]
+            else:
+                updates = [(message, board_updates(message, versions))]
+
+            for feed, items in updates:
+                community_info = feed.community
+                for item in items:
+                    quest_id = item.quest_id
+                    quest_title = item.title
+                    if quest_id in seen_local:
+                        continue
+
+                    frontend = community_info.frontend_url.format(box_id=item.box_id, quest_id=quest_id)
+                    quest_data = item.quest_data
+                    checked = wake is None or wake.refresh
+                    # A recurring quest's cooldown only shows in the account's own view
+                    if checked and (wake or needs_account_view(quest_data) or is_recurring(quest_data)):
+                        # Woken just before a cooldown ends: always a fresh look
+                        quest_data = None if wake else own_detail_cache.get(quest_id, item.stamp)
+                        if quest_data is None:
+                            detail_url = community_info.quest_detail_url_template.format(quest_id=quest_id)
+                            detail_res = await feed.request("GET", detail_url, account_headers)
+                            metrics.DETAIL_FETCHES.inc(community=feed.slug, scope="account", status=detail_res.status_code)
+                            if detail_res.status_code != 200:
+                                continue
+                            quest_data = fast_json.decode_quest(detail_res.content)
+                            own_detail_cache.put(quest_id, item.stamp, quest_data)
+                    if checked:
+                        wait = claimable_in(quest_data)
+                        if wait is None:
+                            continue
+                        if wait > 0:
+                            schedule_wake(async_cooldown_timers, inbox.put_nowait, account_name, feed, item._replace(quest_data=quest_data), wait, replace=wake is not None)
+                            continue
+
+                    for task in quest_data.get("tasks", []):
+                        classify_started = time.monotonic()
+                        plan = match_task(account_name, quest_title, quest_data, task)
+                        metrics.CLASSIFY_SECONDS.observe(time.monotonic() - classify_started, account=account_name)
+                        if plan is None:
+                            continue
+                        matched_at = time.monotonic()
+                        mark_seen(quest_id)
+                        if not await dispatch_claim_async(feed, account_name, account_headers, quest_id, quest_title, frontend, plan, item.detected_at, matched_at, forget_claim, plan_priority(quest_data, plan), is_recurring(quest_data)):
+                            continue
+                        # Let the claim get on the wire before matching anything else
+                        await asyncio.sleep(0)
+                        logging.info("[%s] Claiming%s: %s (%s)", account_name, claim_label(plan), quest_title, describe_plan(plan))
 
-def main():
-    """Main function to start the bot."""
+        except Exception as e:
+            logging.exception("[%s] General error: %s", account_name, e)
+            send_telegram_message(f"[{account_name}] General error: {e}", PRIORITY_ERROR)
+            await asyncio.sleep(POLL_INTERVAL)
+
+async def run_async_engine(accounts):
+    """Run every (account, community) pair on one event loop with a shared async HTTP client."""
+    limiter = async_http.HostLimiter()
+    slugs = list(dict.fromkeys(slug for account in accounts for slug in account.get("communities") or default_communities))
+    global engine_loop
+    engine_loop = asyncio.get_running_loop()
+    async with async_http.make_async_client() as client:
+        await async_http.warm_up(client, transport.WARMUP_URL, transport.WARMUP_CONNECTIONS)
+        async_feeds = {
+            slug: AsyncCommunityFeed(get_community(slug), feed_params, POLL_INTERVAL, client, limiter, on_new_task=announce_new_task)
+            for slug in slugs
+        }
+        feeds.update(async_feeds)  # for /metrics
+        monitors = [asyncio.create_task(monitor_account_async(account, async_feeds)) for account in accounts]
+        # Let every account register before the first poll
+        await asyncio.sleep(0)
+        for slot, feed in enumerate(async_feeds.values()):
+            feed.start(slot, len(async_feeds))
+        await asyncio.gather(*monitors)
+
+def main(accounts=None):
+    """Main function to start the bot (accounts default to parse_accounts_env())."""
     print("🚀 Starting Zealy Bot...")
     
     # Parse accounts from environment
-    accounts = parse_accounts_env()
+    if accounts is None:
+        accounts = parse_accounts_env()
     
     if not accounts:
         print("❌ No accounts found! Please set up environment variables:")
@@ -832,11 +829,37 @@ def main():
     print(f"✅ Found {len(accounts)} account(s):")
     for i, acc in enumerate(accounts, 1):
         cookie_preview = acc['cookie'][:50] + "..." if len(acc['cookie']) > 50 else acc['cookie']
-        print(f"   {i}. {acc['name']} (cookie: {cookie_preview})")
+        print(f"   {i}. {acc['name']} (cookie: {cookie_preview}) → {', '.join(acc['communities'])}")
     
     # Create uploads folder
     os.makedirs('uploads', exist_ok=True)
-    
+
+    if WORKERS > 1 and len(accounts) > 1:
+        # Supervisor mode: accounts are sharded over worker processes running run_worker()
+        import supervisor
+        supervisor.run(accounts, WORKERS)
+        return
+
+    start_web_server()
+    print("🌐 Access the upload page at: http://YOUR_SERVER_IP:5000")
+    try:
+        run_engine(accounts)
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down...")
+
+def start_web_server(host='0.0.0.0', port=5000):
+    """Serve the Flask app from a daemon thread."""
+    flask_thread = threading.Thread(target=lambda: app.run(host=host, port=port, debug=False, use_reloader=False), daemon=True)
+    flask_thread.start()
+    print(f"✅ Started Flask web server on http://{host}:{port}")
+
+def run_engine(accounts):
+    """Monitor accounts with the configured ENGINE; blocks forever."""
+    if ENGINE == "async":
+        print(f"⚡ Running {len(accounts)} account(s) on the asyncio engine")
+        asyncio.run(run_async_engine(accounts))
+        return
+
     # Start monitoring each account in a separate thread
     threads = []
     for account in accounts:
@@ -844,23 +867,23 @@ def main():
         thread.start()
         threads.append(thread)
         print(f"✅ Started monitoring thread for: {account['name']}")
-    
-    # Start Flask app in a separate thread
-    flask_thread = threading.Thread(target=lambda: app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False), daemon=True)
-    flask_thread.start()
-    print("✅ Started Flask web server on http://0.0.0.0:5000")
-    print("🌐 Access the upload page at: http://YOUR_SERVER_IP:5000")
-    
+    monitor_threads.extend(threads)
+
+    # Keep main thread alive
+    while True:
+        time.sleep(60)  # Check every minute
+        # Optional: Check if all threads are still alive
+        alive_threads = [t for t in threads if t.is_alive()]
+        if len(alive_threads) != len(threads):
+            print(f"⚠️  Warning: {len(threads) - len(alive_threads)} thread(s) died!")
+
+def run_worker(accounts, port):
+    """Entry point of a supervisor worker process: its own accounts, with the web app on a local port."""
+    start_web_server('127.0.0.1', port)
     try:
-        # Keep main thread alive
-        while True:
-            time.sleep(60)  # Check every minute
-            # Optional: Check if all threads are still alive
-            alive_threads = [t for t in threads if t.is_alive()]
-            if len(alive_threads) != len(threads):
-                print(f"⚠️  Warning: {len(threads) - len(alive_threads)} thread(s) died!")
+        run_engine(accounts)
     except KeyboardInterrupt:
-        print("\n🛑 Shutting down...")
+        pass
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
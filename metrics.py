@@ -0,0 +1,208 @@
+import bisect
+import threading
+
+# Seconds; covers a fast local claim up to a slow detail fetch under load
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+class Metric:
+    """Base for a labelled metric; one value (or histogram) per label combination."""
+
+    kind = "untyped"
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def samples(self):
+        """Yield (suffix, label values, extra labels, value) for the exposition format."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield "", key, (), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.labelnames, key, extra)} {value}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                # per-bucket (non-cumulative) counts, +Inf last; then sum
+                entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def samples(self):
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", key, (("le", "+Inf" if bound == float("inf") else repr(bound)),), cumulative
+            yield "_sum", key, (), total
+            yield "_count", key, (), cumulative
+
+
+class Registry:
+    """Metrics updated in place plus collectors that read gauges at scrape time."""
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collect):
+        """collect() is called before every render, typically to set gauges."""
+        with self._lock:
+            self._collectors.append(collect)
+
+    def render(self):
+        """Return every metric in the Prometheus text exposition format."""
+        with self._lock:
+            collectors = list(self._collectors)
+            metrics = list(self._metrics)
+        for collect in collectors:
+            collect()
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+# Polling
+POLL_SECONDS = REGISTRY.histogram("zealy_poll_seconds", "Questboard request latency", ("community",))
+POLL_RESPONSES = REGISTRY.counter("zealy_poll_responses_total", "Questboard responses by status code", ("community", "status"))
+POLL_UNCHANGED = REGISTRY.counter("zealy_poll_unchanged_total", "Polls skipped because the board body was unchanged", ("community",))
+POLL_ERRORS = REGISTRY.counter("zealy_poll_errors_total", "Polls that raised", ("community",))
+
+# Quest details
+DETAIL_FETCHES = REGISTRY.counter("zealy_detail_fetches_total", "Quest detail requests by status code", ("community", "scope", "status"))
+DETAIL_SECONDS = REGISTRY.histogram("zealy_detail_seconds", "Quest detail request latency", ("community",))
+DETAIL_CACHE = REGISTRY.counter("zealy_detail_cache_lookups_total", "Detail cache lookups by result", ("cache", "result"))
+DETAIL_CACHE_SIZE = REGISTRY.gauge("zealy_detail_cache_entries", "Quest details held per cache", ("cache",))
+
+# Matching and claiming
+CLASSIFY_SECONDS = REGISTRY.histogram("zealy_classify_seconds", "Time matching one quest's tasks for an account", ("account",))
+CLAIMS = REGISTRY.counter("zealy_claims_total", "Claim outcomes by task kind", ("account", "kind", "outcome"))
+CLAIM_STAGE_SECONDS = REGISTRY.histogram("zealy_claim_stage_seconds", "Detection-to-claim latency per stage", ("kind", "stage"))
+CLAIM_RETRIES = REGISTRY.counter("zealy_claim_retries_total", "Claim attempts retried after a transient failure")
+CLAIM_QUEUE_DEPTH = REGISTRY.gauge("zealy_claim_queue_depth", "Claims waiting for a dispatcher worker")
+CLAIMS_IN_FLIGHT = REGISTRY.gauge("zealy_claims_in_flight", "Claims queued, sending or waiting to retry")
+COOLDOWN_TIMERS = REGISTRY.gauge("zealy_cooldown_timers", "Quests waiting on a cooldown timer")
+COOLDOWN_WAKES = REGISTRY.counter("zealy_cooldown_wakes_total", "Cooldown timers fired, by what they woke for", ("stage",))
+
+# Uploads
+UPLOAD_FILES = REGISTRY.counter("zealy_upload_files_total", "Files uploaded to Zealy by result", ("result",))
+UPLOAD_SECONDS = REGISTRY.histogram("zealy_upload_seconds", "Zealy file upload latency")
+UPLOAD_JOBS = REGISTRY.counter("zealy_upload_jobs_total", "Upload jobs submitted and how they ended", ("state",))
+
+# Telegram
+TELEGRAM_SEND_SECONDS = REGISTRY.histogram("zealy_telegram_send_seconds", "Telegram sendMessage latency")
+TELEGRAM_QUEUE_DEPTH = REGISTRY.gauge("zealy_telegram_queue_depth", "Messages waiting in the Telegram queue")
+TELEGRAM_MESSAGES = REGISTRY.counter("zealy_telegram_messages_total", "Telegram messages by result", ("result",))
+
+# Runtime
+THREADS = REGISTRY.gauge("zealy_threads", "Live Python threads")
+ASYNC_TASKS = REGISTRY.gauge("zealy_async_tasks", "Tasks on the async engine's event loop")
+
+
+def render():
+    return REGISTRY.render()
+
+
+def _add_labels(sample, labels):
+    """Add pre-formatted labels to one exposition sample line."""
+    name, _, value = sample.rpartition(" ")
+    if name.endswith("}"):
+        return f"{name[:-1]},{labels}}} {value}"
+    return f"{name}{{{labels}}} {value}"
+
+
+def merge(expositions):
+    """Merge exposition texts from several processes into one.
+
+    expositions is an iterable of (labels, text); each text's samples get
+    its labels (e.g. {"worker": "0"}) so the series stay distinct, and the
+    samples of every metric are grouped under a single HELP/TYPE header.
+    """
+    families = {}  # name -> [help line, type line, samples]
+    for labels, text in expositions:
+        extra = _format_labels(list(labels), list(labels.values()))[1:-1]
+        family = None
+        for line in text.splitlines():
+            if line.startswith("# HELP ") or line.startswith("# TYPE "):
+                name = line.split(" ", 3)[2]
+                family = families.setdefault(name, [None, None, []])
+                slot = 0 if line.startswith("# HELP ") else 1
+                family[slot] = family[slot] or line
+            elif line and not line.startswith("#"):
+                if family is None:
+                    family = families.setdefault(line.split("{", 1)[0].split(" ", 1)[0], [None, None, []])
+                family[2].append(_add_labels(line, extra) if extra else line)
+    lines = []
+    for help_line, type_line, samples in families.values():
+        lines.extend(line for line in (help_line, type_line) if line)
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,178 @@
+import os
+import time
+import logging
+import threading
+from collections import deque
+
+import requests
+
+import metrics
+
+# Message priorities: lower number is delivered first
+PRIORITY_CLAIM = 0   # claim confirmations / failures
+PRIORITY_ERROR = 1   # loop errors
+PRIORITY_INFO = 2    # "Found task" chatter
+
+# runtime knobs
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "500"))
+# Telegram allows about one message per second per chat and 20 per minute in groups
+TELEGRAM_MIN_INTERVAL = float(os.getenv("TELEGRAM_MIN_INTERVAL", "1.0"))
+TELEGRAM_PER_MINUTE = int(os.getenv("TELEGRAM_PER_MINUTE", "20"))
+TELEGRAM_MAX_RETRIES = int(os.getenv("TELEGRAM_MAX_RETRIES", "3"))
+TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "10"))
+
+
+class TelegramNotifier:
+    """Bounded, prioritised Telegram queue drained by one background thread.
+
+    ``send`` never blocks: it enqueues and returns. The worker paces delivery
+    to the chat's rate limits, honours ``retry_after`` on 429s and re-queues
+    failed messages with a delay instead of sleeping in the caller. When the
+    queue is full the oldest message of the lowest queued priority is dropped
+    (a new message is dropped instead if it is lower priority than everything
+    already waiting).
+    """
+
+    def __init__(self, api_url, chat_id, max_queue=NOTIFY_QUEUE_SIZE):
+        self.api_url = api_url
+        self.chat_id = chat_id
+        self.max_queue = max(1, max_queue)
+        self._queues = {p: deque() for p in (PRIORITY_CLAIM, PRIORITY_ERROR, PRIORITY_INFO)}
+        self._size = 0
+        self._cond = threading.Condition()
+        self._sent_at = deque()  # delivery times within the last minute
+        self._next_send = 0.0
+        self._thread = None
+        self.dropped = 0
+        self.sent = 0
+        self.failed = 0
+        self.last_send_latency = 0.0
+
+    @property
+    def enabled(self):
+        return bool(self.api_url and self.chat_id)
+
+    def depth(self):
+        with self._cond:
+            return self._size
+
+    def send(self, text, priority=PRIORITY_INFO):
+        """Queue a message for delivery. Returns False if it was dropped."""
+        if not self.enabled:
+            return False
+        priority = priority if priority in self._queues else PRIORITY_INFO
+        with self._cond:
+            if self._size >= self.max_queue and not self._evict_for(priority):
+                self.dropped += 1
+                metrics.TELEGRAM_MESSAGES.inc(result="dropped")
+                logging.warning("Telegram queue full, dropping message: %s", text[:80])
+                return False
+            # (text, attempt, not_before)
+            self._queues[priority].append((text, 0, 0.0))
+            self._size += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="telegram-notifier", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def _evict_for(self, priority):
+        """Drop the oldest message of the lowest queued priority to make room."""
+        for p in sorted(self._queues, reverse=True):
+            if p < priority:
+                break
+            if self._queues[p]:
+                self._queues[p].popleft()
+                self._size -= 1
+                self.dropped += 1
+                metrics.TELEGRAM_MESSAGES.inc(result="dropped")
+                return True
+        return False
+
+    def _next_ready(self, now):
+        """Pop the first deliverable message, or return (None, seconds_to_wait)."""
+        wait = None
+        for p in sorted(self._queues):
+            q = self._queues[p]
+            for i, (text, attempt, not_before) in enumerate(q):
+                if not_before <= now:
+                    del q[i]
+                    self._size -= 1
+                    return (p, text, attempt), None
+                wait = not_before - now if wait is None else min(wait, not_before - now)
+        return None, wait
+
+    def _rate_wait(self, now):
+        while self._sent_at and now - self._sent_at[0] >= 60:
+            self._sent_at.popleft()
+        wait = max(0.0, self._next_send - now)
+        if TELEGRAM_PER_MINUTE and len(self._sent_at) >= TELEGRAM_PER_MINUTE:
+            wait = max(wait, 60 - (now - self._sent_at[0]))
+        return wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    now = time.monotonic()
+                    rate_wait = self._rate_wait(now)
+                    if rate_wait > 0:
+                        self._cond.wait(rate_wait)
+                        continue
+                    item, wait = self._next_ready(now)
+                    if item is not None:
+                        break
+                    self._cond.wait(wait)
+            self._deliver(*item)
+
+    def _requeue(self, priority, text, attempt, delay):
+        with self._cond:
+            if attempt >= TELEGRAM_MAX_RETRIES:
+                self.failed += 1
+                metrics.TELEGRAM_MESSAGES.inc(result="failed")
+                logging.error("Failed to send Telegram message after %d attempts", attempt)
+                return
+            self._queues[priority].append((text, attempt, time.monotonic() + delay))
+            self._size += 1
+            self._cond.notify()
+
+    def _deliver(self, priority, text, attempt):
+        started = time.monotonic()
+        with self._cond:
+            self._sent_at.append(started)
+            self._next_send = started + TELEGRAM_MIN_INTERVAL
+        try:
+            resp = requests.post(self.api_url, data={"chat_id": self.chat_id, "text": text}, timeout=TELEGRAM_TIMEOUT)
+        except requests.exceptions.RequestException as exc:
+            delay = 2 * (2 ** attempt)
+            logging.warning("Telegram request failed (attempt %d/%d): %s. Retrying in %d seconds...",
+                            attempt + 1, TELEGRAM_MAX_RETRIES, exc, delay)
+            self._requeue(priority, text, attempt + 1, delay)
+            return
+        except Exception as exc:
+            logging.exception("Unexpected error sending Telegram message: %s", exc)
+            return
+        finally:
+            self.last_send_latency = time.monotonic() - started
+            metrics.TELEGRAM_SEND_SECONDS.observe(self.last_send_latency)
+
+        if resp.status_code == 200:
+            self.sent += 1
+            metrics.TELEGRAM_MESSAGES.inc(result="sent")
+            return
+        logging.warning("Telegram API returned %s: %s (attempt %d/%d)",
+                        resp.status_code, resp.text, attempt + 1, TELEGRAM_MAX_RETRIES)
+        if resp.status_code == 429 or resp.status_code >= 500:
+            delay = 2 * (2 ** attempt)
+            if resp.status_code == 429:
+                try:
+                    delay = float(resp.json().get("parameters", {}).get("retry_after", delay))
+                except ValueError:
+                    pass
+                # Telegram's flood control applies to the whole chat
+                with self._cond:
+                    self._next_send = max(self._next_send, time.monotonic() + delay)
+            self._requeue(priority, text, attempt + 1, delay)
+        else:
+            self.failed += 1
+            metrics.TELEGRAM_MESSAGES.inc(result="failed")
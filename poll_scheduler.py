@@ -0,0 +1,164 @@
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+
+# runtime knobs
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0.2"))            # +/- fraction of the interval
+BURST_INTERVAL = float(os.getenv("BURST_INTERVAL", "0.5"))      # seconds between polls right after a drop
+BURST_DURATION = float(os.getenv("BURST_DURATION", "30"))       # how long burst mode lasts
+MAX_BACKOFF = float(os.getenv("MAX_BACKOFF", "120"))            # cap for 429/5xx backoff
+# Requests per minute each community may use across all accounts (0 = unlimited)
+COMMUNITY_REQUESTS_PER_MINUTE = float(os.getenv("COMMUNITY_REQUESTS_PER_MINUTE", "300"))
+
+
+def parse_retry_after(value):
+    """Return the Retry-After header as seconds from now, or None."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_throttle_status(status_code):
+    """429 and 5xx mean "slow down", anything else is not the scheduler's business."""
+    return status_code == 429 or (status_code is not None and status_code >= 500)
+
+
+class PollScheduler:
+    """Works out how long a feed waits before its next questboard poll.
+
+    - every delay gets +/- ``jitter`` so feeds drift apart instead of polling in lockstep
+    - ``initial_delay`` spreads several feeds across one interval at startup
+    - 429/5xx back off exponentially, never sooner than the server's Retry-After
+    - a poll that finds new quests switches to ``burst_interval`` for ``burst_duration`` seconds
+    """
+
+    def __init__(self, base_interval, jitter=POLL_JITTER, burst_interval=BURST_INTERVAL,
+                 burst_duration=BURST_DURATION, max_backoff=MAX_BACKOFF):
+        self.base_interval = base_interval
+        self.jitter = jitter
+        self.burst_interval = min(burst_interval, base_interval)
+        self.burst_duration = burst_duration
+        self.max_backoff = max_backoff
+        self.errors = 0
+        self.retry_after = None
+        self.burst_until = 0.0
+
+    def _jittered(self, delay):
+        if not self.jitter:
+            return delay
+        return max(0.0, delay * random.uniform(1 - self.jitter, 1 + self.jitter))
+
+    def initial_delay(self, slot, slots):
+        """Offset for feed number ``slot`` of ``slots`` so they don't all start at once."""
+        if slots <= 1:
+            return 0.0
+        return self.base_interval * (slot % slots) / slots
+
+    def in_burst(self):
+        return time.monotonic() < self.burst_until
+
+    def on_success(self, found_new=False):
+        self.errors = 0
+        self.retry_after = None
+        if found_new:
+            self.burst_until = time.monotonic() + self.burst_duration
+
+    def on_error(self, status_code=None, retry_after=None):
+        """Record a failed request; only throttling statuses (or exceptions) back off."""
+        if status_code is not None and not is_throttle_status(status_code):
+            return
+        self.errors += 1
+        self.retry_after = parse_retry_after(retry_after)
+
+    def next_delay(self):
+        """Seconds to wait before the next poll."""
+        if self.errors:
+            backoff = min(self.max_backoff, self.base_interval * (2 ** self.errors))
+            if self.retry_after is not None:
+                backoff = max(backoff, self.retry_after)
+            return self._jittered(backoff)
+        if self.in_burst():
+            return self._jittered(self.burst_interval)
+        return self._jittered(self.base_interval)
+
+
+class DetailBackoff:
+    """Per-quest retry delays for quest details that failed to fetch.
+
+    A quest whose detail keeps failing waits ``base_interval * 2**failures``
+    (capped at ``max_backoff``) before it is tried again, instead of backing
+    off the whole feed. A new summary stamp means the quest changed, so it
+    is tried again at once.
+    """
+
+    def __init__(self, base_interval, max_backoff=MAX_BACKOFF):
+        self.base_interval = base_interval
+        self.max_backoff = max_backoff
+        self._failures = {}  # quest_id -> (stamp, failures, retry_at)
+        self._lock = threading.Lock()
+
+    def ready(self, quest_id, stamp):
+        """True if the quest's detail may be fetched now."""
+        with self._lock:
+            entry = self._failures.get(quest_id)
+        return entry is None or entry[0] != stamp or time.monotonic() >= entry[2]
+
+    def on_error(self, quest_id, stamp):
+        with self._lock:
+            entry = self._failures.get(quest_id)
+            failures = entry[1] + 1 if entry is not None and entry[0] == stamp else 1
+            delay = min(self.max_backoff, self.base_interval * (2 ** failures))
+            self._failures[quest_id] = (stamp, failures, time.monotonic() + delay)
+
+    def on_success(self, quest_id):
+        with self._lock:
+            self._failures.pop(quest_id, None)
+
+    def retain(self, quest_ids):
+        """Forget quests that are no longer on the board."""
+        with self._lock:
+            for quest_id in set(self._failures) - set(quest_ids):
+                del self._failures[quest_id]
+
+
+class RequestBudget:
+    """Token bucket shared by every request made on behalf of one community.
+
+    ``reserve`` takes a token and returns how long the caller must wait
+    before sending, so the threaded engine can ``time.sleep`` and the async
+    engine can ``await asyncio.sleep`` on the same budget.
+    """
+
+    def __init__(self, per_minute=COMMUNITY_REQUESTS_PER_MINUTE, burst=None):
+        self.rate = per_minute / 60.0
+        self.capacity = burst if burst is not None else max(1.0, self.rate * 10)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self):
+        """Block until a request may be sent."""
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
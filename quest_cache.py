@@ -0,0 +1,85 @@
+import os
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+
+import fast_json
+import metrics
+
+# runtime knobs
+QUEST_CACHE_SIZE = int(os.getenv("QUEST_CACHE_SIZE", "512"))
+QUEST_CACHE_TTL = float(os.getenv("QUEST_CACHE_TTL", "300"))
+
+
+def quest_summary_stamp(quest):
+    """Return a validity stamp for a questboard quest summary.
+
+    The questboard already carries everything that changes when a quest is
+    edited (name, rewards, position, status flags...), so a digest of the
+    summary tells us whether a cached detail is still current.
+    """
+    raw = fast_json.dumpb(quest, sort_keys=True)
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+class QuestDetailCache:
+    """Thread-safe LRU cache of parsed quest details keyed by quest id.
+
+    Each entry remembers the summary stamp it was fetched under and when it
+    was stored. A lookup only hits when the stamp still matches and the entry
+    is younger than ``ttl`` seconds; the least recently used entry is evicted
+    once ``max_entries`` is reached. Lookups of a cache given a ``name``
+    are counted in metrics.DETAIL_CACHE.
+    """
+
+    def __init__(self, max_entries=QUEST_CACHE_SIZE, ttl=QUEST_CACHE_TTL, name=None):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, quest_id, stamp):
+        """Return the cached quest_data for quest_id, or None if missing/stale."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(quest_id)
+            if entry is None:
+                self._count("miss")
+                return None
+            cached_stamp, stored_at, quest_data = entry
+            if cached_stamp != stamp or (self.ttl and now - stored_at > self.ttl):
+                del self._entries[quest_id]
+                self._count("miss")
+                return None
+            self._entries.move_to_end(quest_id)
+            self._count("hit")
+            return quest_data
+
+    def _count(self, result):
+        if result == "hit":
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.name is not None:
+            metrics.DETAIL_CACHE.inc(cache=self.name, result=result)
+
+    def put(self, quest_id, stamp, quest_data):
+        """Store quest_data for quest_id under the given summary stamp."""
+        with self._lock:
+            self._entries[quest_id] = (stamp, time.monotonic(), quest_data)
+            self._entries.move_to_end(quest_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, quest_id):
+        """Drop a single quest from the cache."""
+        with self._lock:
+            self._entries.pop(quest_id, None)
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
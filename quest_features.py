@@ -0,0 +1,162 @@
+import os
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+# Phrases in a url task's description that mean "submit your X/Twitter comment"
+X_URL_KEYWORDS = (
+    "post the url to your comment",
+    "submit the url",
+    "x comment",
+    "twitter comment",
+    "comment url",
+    "url to your comment",
+)
+MENTION_KEYWORDS = ("instagram", "reddit")
+
+TWEET_ID_RE = re.compile(r"/status(?:es)?/(\d+)")
+
+# runtime knobs
+FEATURES_CACHE_SIZE = int(os.getenv("FEATURES_CACHE_SIZE", "1024"))
+
+# Everything the matchers need from a quest description, computed in one pass
+QuestFeatures = namedtuple(
+    "QuestFeatures",
+    "task_types is_instagram is_reddit is_x_url instagram_links reddit_links x_links tweet_ids keywords",
+)
+
+
+def _link_href(sub):
+    """Yield the href of every link mark on a paragraph child."""
+    for mark in sub.get("marks") or ():
+        if mark.get("type") == "link":
+            href = (mark.get("attrs") or {}).get("href", "")
+            if href:
+                yield href
+
+
+def extract_features(quest_data):
+    """Walk the quest description once and return its QuestFeatures.
+
+    Uses an explicit stack instead of recursion so arbitrarily nested
+    documents can't hit the recursion limit. Matches the rules of the old
+    per-platform walkers: links come from the marks on paragraph children
+    (at any depth) and from tweet embeds; the Instagram/Reddit "mention"
+    check looks at the quest name and the top-level paragraphs only.
+    """
+    name = (quest_data.get("name") or "").lower()
+    tasks = quest_data.get("tasks") or []
+    task_types = tuple(task.get("type") for task in tasks)
+
+    mentions = {kw for kw in MENTION_KEYWORDS if kw in name}
+    instagram_links, reddit_links, x_links = [], [], []
+    tweet_ids = []
+    x_keyword_hits = set()
+
+    desc = quest_data.get("description") or {}
+    # Frames of (node iterator, depth, inside a paragraph); a node's children
+    # are walked before its next sibling, so links keep document order
+    stack = [(iter(desc.get("content") or ()), 0, False)]
+    while stack:
+        nodes, depth, in_paragraph = stack[-1]
+        item = next(nodes, None)
+        if item is None:
+            stack.pop()
+            continue
+        if in_paragraph:
+            text = item.get("text")
+            if text:
+                text = text.lower()
+                for kw in X_URL_KEYWORDS:
+                    if kw in text:
+                        x_keyword_hits.add(kw)
+                if depth == 0:
+                    for kw in MENTION_KEYWORDS:
+                        if kw in text:
+                            mentions.add(kw)
+            for href in _link_href(item):
+                if "instagram.com" in href:
+                    instagram_links.append(href)
+                    if depth == 0:
+                        mentions.add("instagram")
+                if "reddit.com" in href:
+                    reddit_links.append(href)
+                    if depth == 0:
+                        mentions.add("reddit")
+                if "x.com" in href or "twitter.com" in href:
+                    x_links.append(href)
+            if item.get("content"):
+                stack.append((iter(item["content"]), depth + 1, False))
+            continue
+        item_type = item.get("type")
+        if item_type == "paragraph":
+            stack.append((iter(item.get("content") or ()), depth, True))
+        elif item_type == "tweet":
+            attrs = item.get("attrs") or {}
+            src = attrs.get("src", "")
+            if src and ("x.com" in src or "twitter.com" in src):
+                x_links.append(src)
+            if attrs.get("tweetId"):
+                tweet_ids.append(str(attrs["tweetId"]))
+        elif item.get("content"):
+            stack.append((iter(item["content"]), depth + 1, False))
+
+    for task in tasks:
+        tweet_id = (task.get("metadata") or {}).get("tweetId")
+        if tweet_id:
+            tweet_ids.append(str(tweet_id))
+    for link in x_links:
+        match = TWEET_ID_RE.search(link)
+        if match:
+            tweet_ids.append(match.group(1))
+
+    return QuestFeatures(
+        task_types=task_types,
+        is_instagram="instagram" in mentions,
+        is_reddit="reddit" in mentions,
+        is_x_url="url" in task_types and bool(x_keyword_hits),
+        instagram_links=tuple(instagram_links),
+        reddit_links=tuple(reddit_links),
+        x_links=tuple(x_links),
+        tweet_ids=tuple(dict.fromkeys(tweet_ids)),
+        keywords=frozenset(mentions | x_keyword_hits),
+    )
+
+
+class FeatureCache:
+    """Memoize QuestFeatures per quest id.
+
+    An entry is reused only while it was computed from the very same
+    quest_data object; the detail caches hand out the same object until the
+    quest changes, so a changed quest is re-extracted automatically.
+    """
+
+    def __init__(self, max_entries=FEATURES_CACHE_SIZE):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, quest_data):
+        quest_id = quest_data.get("id")
+        if quest_id is None:
+            return extract_features(quest_data)
+        with self._lock:
+            entry = self._entries.get(quest_id)
+            if entry is not None and entry[0] is quest_data:
+                self._entries.move_to_end(quest_id)
+                return entry[1]
+        features = extract_features(quest_data)
+        with self._lock:
+            self._entries[quest_id] = (quest_data, features)
+            self._entries.move_to_end(quest_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return features
+
+
+_feature_cache = FeatureCache()
+
+
+def quest_features(quest_data):
+    """Return the memoized QuestFeatures for quest_data."""
+    return _feature_cache.get(quest_data)
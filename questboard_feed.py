@@ -0,0 +1,574 @@
+import os
+import time
+import heapq
+import hashlib
+import random
+import asyncio
+import logging
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import async_http
+import fast_json
+import metrics
+import transport
+from poll_scheduler import DetailBackoff, PollScheduler, RequestBudget
+from quest_cache import QuestDetailCache, quest_summary_stamp
+
+# runtime knobs
+# Threads the feed scheduler may use to run questboard polls in parallel
+POLL_WORKERS = int(os.getenv("POLL_WORKERS", "4"))
+# Threads per feed fetching new quest details in parallel (still capped per host)
+DETAIL_WORKERS = int(os.getenv("DETAIL_WORKERS", "8"))
+
+# One quest on the shared board, with the detail parsed once for everyone.
+# version is the snapshot in which the quest last appeared or changed, so an
+# account only has to look at items newer than the last snapshot it handled.
+# detected_at is the time.monotonic() at which that poll's board arrived.
+BoardQuest = namedtuple("BoardQuest", "box_id quest_id title stamp quest_data fresh version detected_at")
+
+# Detail fields that describe the *polling* account's own status rather than the
+# quest itself. When any of these is set the shared copy can't be trusted for
+# another account and it has to look the quest up with its own session.
+ACCOUNT_SPECIFIC_FIELDS = ("locked", "claimed", "completed", "inReview", "retryAfter")
+
+
+def needs_account_view(quest_data):
+    """Return True if quest_data carries per-account lock/cooldown/claim status."""
+    return any(quest_data.get(field) for field in ACCOUNT_SPECIFIC_FIELDS)
+
+
+def decode_detail(slug, quest_id, body):
+    """Parse a quest detail body; returns None (and logs) if it isn't a JSON object."""
+    try:
+        quest_data = fast_json.decode_quest(body)
+    except (TypeError, ValueError) as e:
+        logging.warning("[%s] Bad detail for quest %s: %s", slug, quest_id, e)
+        return None
+    if not isinstance(quest_data, dict):
+        logging.warning("[%s] Bad detail for quest %s: not a JSON object", slug, quest_id)
+        return None
+    return quest_data
+
+
+def body_digest(body):
+    """Digest of a raw questboard response body."""
+    return hashlib.blake2b(body, digest_size=16).digest()
+
+
+class BoardState:
+    """What the last poll saw, so the next one only works on what changed.
+
+    Three levels, cheapest first:
+      - an identical raw body means nothing changed: skip parsing entirely
+      - a box whose digest is unchanged keeps its quests as they were
+      - inside a changed box only quests whose summary stamp moved (or are
+        new) need their details; quests missing from the board are removed
+    A poll that could not fetch every detail is not recorded, so the next
+    one retries instead of being short-circuited.
+    """
+
+    def __init__(self):
+        self.body_digest = None
+        self.boxes = {}  # box_id -> (digest, [quest_id, ...])
+        self.items = {}  # quest_id -> BoardQuest
+
+    def unchanged(self, body):
+        return self.body_digest is not None and body_digest(body) == self.body_digest
+
+    def diff(self, boxes):
+        """Split a parsed board into entries in board order.
+
+        Returns (entries, box_digests) where each entry is
+        (box_id, quest_id, title, stamp, item) and item is the unchanged
+        BoardQuest from the last poll, or None if the quest is new or changed.
+        """
+        entries = []
+        box_digests = {}
+        for box in boxes:
+            box_id = box.get("id")
+            digest = quest_summary_stamp(box)
+            box_digests[box_id] = digest
+            previous = self.boxes.get(box_id)
+            if previous is not None and previous[0] == digest:
+                for quest_id in previous[1]:
+                    item = self.items[quest_id]
+                    entries.append((box_id, quest_id, item.title, item.stamp, item))
+                continue
+            for quest in box.get("quests", []):
+                quest_id = quest.get("id")
+                if not quest_id:
+                    continue
+                stamp = quest_summary_stamp(quest)
+                item = self.items.get(quest_id)
+                if item is not None and (item.stamp != stamp or item.box_id != box_id):
+                    item = None
+                entries.append((box_id, quest_id, quest.get("name"), stamp, item))
+        return entries, box_digests
+
+    def commit(self, body, box_digests, snapshot, incomplete_boxes):
+        """Remember this poll. Returns the ids of quests that left the board."""
+        items = {item.quest_id: item for item in snapshot}
+        removed = set(self.items) - set(items)
+        boxes = {}
+        for item in snapshot:
+            boxes.setdefault(item.box_id, []).append(item.quest_id)
+        self.boxes = {
+            box_id: (digest, boxes.get(box_id, []))
+            for box_id, digest in box_digests.items()
+            if box_id not in incomplete_boxes
+        }
+        self.items = items
+        self.body_digest = None if incomplete_boxes else body_digest(body)
+        return removed
+
+
+# Per-host cap on detail fetches shared by every threaded feed
+detail_limiter = async_http.HostLimiter(semaphore_factory=threading.BoundedSemaphore)
+
+
+class CommunityFeed:
+    """Poll one community's questboard once and fan it out to every account.
+
+    Each poll fetches the questboard and any new or changed quest details
+    with one of the registered sessions, publishes the parsed board as a
+    numbered snapshot and drops the feed into every subscribed account's
+    inbox. Account loops only do their own matching and claiming. Polls are
+    driven by a FeedScheduler shared by all communities.
+
+    A BoardState keeps the previous poll so an identical board costs one hash
+    and a changed one only fetches and publishes the quests that moved.
+    Details of new quests are fetched in parallel (DETAIL_WORKERS, capped by
+    the poll session's pool size and per host by detail_limiter) and every
+    arrival is published as its own snapshot version, so accounts start
+    claiming without waiting for the rest.
+    A 429 on any detail backs the feed off once for the poll; other detail
+    failures back off only that quest (DetailBackoff).
+    """
+
+    def __init__(self, community, params, poll_interval, on_new_task=None):
+        self.community = community
+        self.slug = community.slug
+        self.params = params
+        self.on_new_task = on_new_task
+        self.detail_cache = QuestDetailCache(name=f"feed:{self.slug}")
+        self.scheduler = PollScheduler(poll_interval)
+        self.detail_backoff = DetailBackoff(poll_interval)
+        # Shared by the feed and every account's fallback detail fetches
+        self.budget = RequestBudget()
+
+        self._sessions = []  # [(account_name, session)]
+        self._inboxes = []
+        self._poller_index = 0
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot = []
+        self.board = BoardState()
+        self._throttled = None
+        self._detail_pool = None
+        self.fetch_count = 0
+        self.unchanged_count = 0
+
+    def register(self, account_name, session, inbox):
+        """Add an account's session to the polling pool and subscribe its inbox to new snapshots."""
+        with self._lock:
+            self._sessions.append((account_name, session))
+            self._inboxes.append(inbox)
+
+    def latest(self):
+        """Return (version, quests) for the most recent snapshot."""
+        with self._lock:
+            return self._version, self._snapshot
+
+    def _poller(self):
+        with self._lock:
+            if not self._sessions:
+                return None, None
+            return self._sessions[self._poller_index % len(self._sessions)]
+
+    def _rotate_poller(self):
+        """Switch polling to the next registered account (e.g. after a 401 on an expired cookie)."""
+        with self._lock:
+            self._poller_index += 1
+
+    def get(self, session, url, **kwargs):
+        """GET on behalf of this community: counts against its budget and sends its headers."""
+        self.budget.acquire()
+        return session.get(url, headers=self.community.headers, timeout=10, **kwargs)
+
+    def poll(self):
+        """Run one poll, recording failures with the scheduler. Returns seconds until the next one."""
+        try:
+            self.poll_once()
+        except Exception as e:
+            logging.exception("[%s] Feed error: %s", self.slug, e)
+            metrics.POLL_ERRORS.inc(community=self.slug)
+            self.scheduler.on_error()
+            # Re-open this session's connections while the next account takes over
+            transport.rewarm(self._poller()[1])
+            self._rotate_poller()
+        return self.scheduler.next_delay()
+
+    def poll_once(self):
+        """Fetch the questboard and publish a new snapshot if anything changed. Returns the snapshot or None."""
+        account_name, session = self._poller()
+        if session is None:
+            return None
+
+        self.fetch_count += 1
+        logging.info("[%s] Fetching via %s.... Attempt #%d", self.slug, account_name, self.fetch_count)
+        started = time.monotonic()
+        resp = self.get(session, self.community.api_url, params=self.params)
+        metrics.POLL_SECONDS.observe(time.monotonic() - started, community=self.slug)
+        metrics.POLL_RESPONSES.inc(community=self.slug, status=resp.status_code)
+        if resp.status_code != 200:
+            logging.warning("[%s] Error fetching questboard via %s: %s", self.slug, account_name, resp.status_code)
+            self.scheduler.on_error(resp.status_code, resp.headers.get("Retry-After"))
+            self._rotate_poller()
+            return None
+
+        detected_at = time.monotonic()
+        body = resp.content
+        if self.board.unchanged(body):
+            self.unchanged_count += 1
+            metrics.POLL_UNCHANGED.inc(community=self.slug)
+            self.scheduler.on_success(found_new=False)
+            return None
+
+        entries, box_digests = self.board.diff(fast_json.loads(body))
+        ready = {}  # quest_id -> BoardQuest, published so far
+        changed = []
+        to_fetch = []
+        incomplete_boxes = set()
+        self.detail_backoff.retain(entry[1] for entry in entries)
+        for box_id, quest_id, title, stamp, item in entries:
+            if item is None:
+                quest_data = self.detail_cache.get(quest_id, stamp)
+                if quest_data is None:
+                    # A quest whose detail keeps failing waits out its own backoff
+                    if self.detail_backoff.ready(quest_id, stamp):
+                        to_fetch.append((box_id, quest_id, title, stamp))
+                    else:
+                        incomplete_boxes.add(box_id)
+                    continue
+                item = BoardQuest(box_id, quest_id, title, stamp, quest_data, False, self._version + 1, detected_at)
+                changed.append(item)
+            ready[quest_id] = item
+
+        removed = set(self.board.items) - {entry[1] for entry in entries}
+        if changed or removed:
+            self._publish(list(ready.values()))
+
+        # New details are fetched in parallel and each quest is published the
+        # moment its own detail arrives, so claims follow response order
+        self._throttled = None
+        if self._detail_pool is None:
+            # No more fetches at once than the poll session keeps connections for
+            workers = min(DETAIL_WORKERS, getattr(session, "pool_size", DETAIL_WORKERS))
+            self._detail_pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix=f"detail-{self.slug}")
+        futures = {
+            self._detail_pool.submit(self._fetch_detail, session, quest_id, stamp): (box_id, quest_id, title, stamp)
+            for box_id, quest_id, title, stamp in to_fetch
+        }
+        for future in as_completed(futures):
+            box_id, quest_id, title, stamp = futures[future]
+            quest_data = future.result()
+            if quest_data is None:
+                incomplete_boxes.add(box_id)
+                continue
+            self.detail_cache.put(quest_id, stamp, quest_data)
+            item = BoardQuest(box_id, quest_id, title, stamp, quest_data, True, self._version + 1, detected_at)
+            changed.append(item)
+            ready[quest_id] = item
+            self._publish(list(ready.values()), item)
+
+        snapshot = [ready[entry[1]] for entry in entries if entry[1] in ready]
+        removed = self.board.commit(body, box_digests, snapshot, incomplete_boxes)
+        for quest_id in removed:
+            self.detail_cache.invalidate(quest_id)
+        if self._throttled:
+            # One backoff step per poll, however many details were refused
+            self.scheduler.on_error(*self._throttled)
+        else:
+            self.scheduler.on_success(found_new=any(item.fresh for item in changed))
+        if not changed and not removed:
+            return None
+        with self._lock:
+            # Same content in board order; no new version, nothing to hand out
+            self._snapshot = snapshot
+        return snapshot
+
+    def _fetch_detail(self, session, quest_id, stamp):
+        """Fetch one quest detail under the per-host limit. Returns quest_data or None.
+
+        A 429 marks the poll as throttled; any other failure only backs off
+        this quest.
+        """
+        # Once throttled, leave the remaining details for the next poll
+        if self._throttled:
+            return None
+        url = self.community.quest_detail_url_template.format(quest_id=quest_id)
+        try:
+            with detail_limiter.for_url(url):
+                started = time.monotonic()
+                res = self.get(session, url)
+        except Exception as e:
+            logging.warning("[%s] Error fetching quest %s: %s", self.slug, quest_id, e)
+            metrics.DETAIL_FETCHES.inc(community=self.slug, scope="feed", status="error")
+            self.detail_backoff.on_error(quest_id, stamp)
+            return None
+        metrics.DETAIL_SECONDS.observe(time.monotonic() - started, community=self.slug)
+        if res.status_code != 200:
+            metrics.DETAIL_FETCHES.inc(community=self.slug, scope="feed", status=res.status_code)
+            if res.status_code == 429:
+                self._throttled = (res.status_code, res.headers.get("Retry-After"))
+            else:
+                self.detail_backoff.on_error(quest_id, stamp)
+            return None
+        quest_data = decode_detail(self.slug, quest_id, res.content)
+        metrics.DETAIL_FETCHES.inc(community=self.slug, scope="feed", status=200 if quest_data is not None else "invalid")
+        if quest_data is None:
+            self.detail_backoff.on_error(quest_id, stamp)
+            return None
+        self.detail_backoff.on_success(quest_id)
+        return quest_data
+
+    def _publish(self, snapshot, fresh_item=None):
+        """Publish a new snapshot version to every inbox, then announce fresh_item."""
+        with self._lock:
+            self._version += 1
+            self._snapshot = snapshot
+            inboxes = list(self._inboxes)
+        # Accounts first so claims go out before any announcement work
+        for inbox in inboxes:
+            inbox.put(self)
+        if fresh_item is not None and self.on_new_task:
+            self.on_new_task(self, fresh_item)
+
+
+class FeedScheduler:
+    """One scheduler thread interleaving the polls of every community feed.
+
+    Feeds sit in a heap ordered by their next due time; due polls run on a
+    small shared pool (POLL_WORKERS) so one slow community doesn't hold up
+    the others, and a feed is never polled twice at once.
+    """
+
+    def __init__(self, workers=POLL_WORKERS):
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="poll")
+        self._thread = None
+        self.feeds = []
+
+    def add(self, feed):
+        """Start polling a feed, at a random offset within its interval so feeds spread out."""
+        with self._cond:
+            self.feeds.append(feed)
+            self._push(time.monotonic() + random.uniform(0, feed.scheduler.base_interval), feed)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="feed-scheduler", daemon=True)
+                self._thread.start()
+
+    def _push(self, due, feed):
+        self._seq += 1
+        heapq.heappush(self._heap, (due, self._seq, feed))
+        self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, feed = heapq.heappop(self._heap)
+            self._pool.submit(self._poll, feed)
+
+    def _poll(self, feed):
+        delay = feed.poll()
+        with self._cond:
+            self._push(time.monotonic() + delay, feed)
+
+
+class AsyncCommunityFeed:
+    """asyncio counterpart of CommunityFeed for ENGINE=async.
+
+    Polls with one registered account's headers over the shared client and
+    fetches new quest details concurrently (bounded by the HostLimiter),
+    publishing each quest as soon as its detail arrives. Every feed runs as
+    its own task on the engine's event loop.
+    """
+
+    def __init__(self, community, params, poll_interval, client, limiter, on_new_task=None):
+        self.community = community
+        self.slug = community.slug
+        self.params = params
+        self.scheduler = PollScheduler(poll_interval)
+        self.detail_backoff = DetailBackoff(poll_interval)
+        self.budget = RequestBudget()
+        self.client = client
+        self.limiter = limiter
+        self.on_new_task = on_new_task
+        self.detail_cache = QuestDetailCache(name=f"feed:{self.slug}")
+
+        self._accounts = []  # [(account_name, headers)]
+        self._inboxes = []
+        self._poller_index = 0
+        self._version = 0
+        self._snapshot = []
+        self._task = None
+        self._throttled = None
+        self.board = BoardState()
+        self.fetch_count = 0
+        self.unchanged_count = 0
+
+    def register(self, account_name, headers, inbox):
+        """Add an account's headers to the polling pool and subscribe its inbox."""
+        self._accounts.append((account_name, headers))
+        self._inboxes.append(inbox)
+
+    def latest(self):
+        return self._version, self._snapshot
+
+    def start(self, slot=0, slots=1):
+        """Start polling on the running event loop."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(slot, slots), name=f"feed-{self.slug}")
+
+    async def _run(self, slot, slots):
+        await asyncio.sleep(self.scheduler.initial_delay(slot, slots))
+        while True:
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logging.exception("[%s] Feed error: %s", self.slug, e)
+                metrics.POLL_ERRORS.inc(community=self.slug)
+                self.scheduler.on_error()
+                self._poller_index += 1
+            await asyncio.sleep(self.scheduler.next_delay())
+
+    async def request(self, method, url, headers, **kwargs):
+        """Send one request for this community through its budget and the host limiter."""
+        wait = self.budget.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        headers = dict(headers, **self.community.headers)
+        return await async_http.request(self.client, self.limiter, method, url, headers=headers, **kwargs)
+
+    async def _fetch_detail(self, headers, quest_id, stamp):
+        if self._throttled:
+            return None
+        url = self.community.quest_detail_url_template.format(quest_id=quest_id)
+        started = time.monotonic()
+        try:
+            res = await self.request("GET", url, headers)
+        except Exception as e:
+            logging.warning("[%s] Error fetching quest %s: %s", self.slug, quest_id, e)
+            metrics.DETAIL_FETCHES.inc(community=self.slug, scope="feed", status="error")
+            self.detail_backoff.on_error(quest_id, stamp)
+            return None
+        metrics.DETAIL_SECONDS.observe(time.monotonic() - started, community=self.slug)
+        if res.status_code != 200:
+            metrics.DETAIL_FETCHES.inc(community=self.slug, scope="feed", status=res.status_code)
+            if res.status_code == 429:
+                self._throttled = (res.status_code, res.headers.get("Retry-After"))
+            else:
+                self.detail_backoff.on_error(quest_id, stamp)
+            return None
+        quest_data = decode_detail(self.slug, quest_id, res.content)
+        metrics.DETAIL_FETCHES.inc(community=self.slug, scope="feed", status=200 if quest_data is not None else "invalid")
+        if quest_data is None:
+            self.detail_backoff.on_error(quest_id, stamp)
+            return None
+        self.detail_backoff.on_success(quest_id)
+        return quest_data
+
+    async def poll_once(self):
+        """Fetch the questboard and publish a new snapshot if anything changed. Returns the snapshot or None."""
+        if not self._accounts:
+            return None
+        account_name, headers = self._accounts[self._poller_index % len(self._accounts)]
+
+        self.fetch_count += 1
+        logging.info("[%s] Fetching via %s.... Attempt #%d", self.slug, account_name, self.fetch_count)
+        started = time.monotonic()
+        resp = await self.request("GET", self.community.api_url, headers, params=self.params)
+        metrics.POLL_SECONDS.observe(time.monotonic() - started, community=self.slug)
+        metrics.POLL_RESPONSES.inc(community=self.slug, status=resp.status_code)
+        if resp.status_code != 200:
+            logging.warning("[%s] Error fetching questboard via %s: %s", self.slug, account_name, resp.status_code)
+            self.scheduler.on_error(resp.status_code, resp.headers.get("Retry-After"))
+            self._poller_index += 1
+            return None
+
+        detected_at = time.monotonic()
+        body = resp.content
+        if self.board.unchanged(body):
+            self.unchanged_count += 1
+            metrics.POLL_UNCHANGED.inc(community=self.slug)
+            self.scheduler.on_success(found_new=False)
+            return None
+
+        entries, box_digests = self.board.diff(fast_json.loads(body))
+        ready = {}
+        changed = []
+        to_fetch = []
+        incomplete_boxes = set()
+        self.detail_backoff.retain(entry[1] for entry in entries)
+        for box_id, quest_id, title, stamp, item in entries:
+            if item is None:
+                quest_data = self.detail_cache.get(quest_id, stamp)
+                if quest_data is None:
+                    if self.detail_backoff.ready(quest_id, stamp):
+                        to_fetch.append((box_id, quest_id, title, stamp))
+                    else:
+                        incomplete_boxes.add(box_id)
+                    continue
+                item = BoardQuest(box_id, quest_id, title, stamp, quest_data, False, self._version + 1, detected_at)
+                changed.append(item)
+            ready[quest_id] = item
+
+        removed = set(self.board.items) - {entry[1] for entry in entries}
+        if changed or removed:
+            await self._publish(list(ready.values()))
+
+        self._throttled = None
+        fetches = [asyncio.create_task(self._fetch_entry(headers, entry)) for entry in to_fetch]
+        for fetch in asyncio.as_completed(fetches):
+            (box_id, quest_id, title, stamp), quest_data = await fetch
+            if quest_data is None:
+                incomplete_boxes.add(box_id)
+                continue
+            self.detail_cache.put(quest_id, stamp, quest_data)
+            item = BoardQuest(box_id, quest_id, title, stamp, quest_data, True, self._version + 1, detected_at)
+            changed.append(item)
+            ready[quest_id] = item
+            await self._publish(list(ready.values()), item)
+
+        snapshot = [ready[entry[1]] for entry in entries if entry[1] in ready]
+        removed = self.board.commit(body, box_digests, snapshot, incomplete_boxes)
+        for quest_id in removed:
+            self.detail_cache.invalidate(quest_id)
+        if self._throttled:
+            # One backoff step per poll, however many details were refused
+            self.scheduler.on_error(*self._throttled)
+        else:
+            self.scheduler.on_success(found_new=any(item.fresh for item in changed))
+        if not changed and not removed:
+            return None
+        self._snapshot = snapshot
+        return snapshot
+
+    async def _fetch_entry(self, headers, entry):
+        return entry, await self._fetch_detail(headers, entry[1], entry[3])
+
+    async def _publish(self, snapshot, fresh_item=None):
+        self._version += 1
+        self._snapshot = snapshot
+        for inbox in self._inboxes:
+            inbox.put_nowait(self)
+        if fresh_item is not None and self.on_new_task:
+            # Let the account loops start their claims before announcing
+            await asyncio.sleep(0)
+            self.on_new_task(self, fresh_item)
@@ -0,0 +1,159 @@
+import os
+import time
+import queue
+import logging
+import itertools
+import threading
+
+import fast_json
+import storage
+
+# runtime knobs
+SEEN_FLUSH_INTERVAL = float(os.getenv("SEEN_FLUSH_INTERVAL", "0.5"))
+SEEN_BATCH_SIZE = int(os.getenv("SEEN_BATCH_SIZE", "256"))
+# Seconds before retrying a batch that failed to commit; doubles up to SEEN_RETRY_MAX
+SEEN_RETRY_DELAY = float(os.getenv("SEEN_RETRY_DELAY", "1"))
+SEEN_RETRY_MAX = float(os.getenv("SEEN_RETRY_MAX", "60"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS seen_quests (
+    account TEXT NOT NULL,
+    quest_id TEXT NOT NULL,
+    seen_at REAL NOT NULL,
+    PRIMARY KEY (account, quest_id)
+) WITHOUT ROWID
+"""
+
+
+class SeenStore:
+    """Seen quest ids per account, persisted in SQLite off the poll thread.
+
+    ``add`` and ``discard`` only put the change on a queue; a writer thread
+    commits whatever has accumulated in one transaction (group commit), so
+    recording a claim is O(1) for the caller and a crash can't truncate
+    earlier history. A batch that fails to commit is kept and retried,
+    ahead of anything queued after it.
+    """
+
+    def __init__(self, path=storage.STATE_DB):
+        self.path = path
+        self._queue = queue.Queue()
+        self._cond = threading.Condition()
+        self._queued = 0  # changes handed to _put
+        self._committed = 0  # of those, how many are in the database
+        self._thread = None
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def _ensure_schema(self, conn):
+        if not self._ready:
+            conn.execute(SCHEMA)
+            self._ready = True
+
+    def load(self, account_name):
+        """Return the set of quest ids already seen by an account.
+
+        A legacy uploads/<account>/seen_quests.json is imported on first load
+        and renamed to seen_quests.json.migrated.
+        """
+        conn = storage.connect(self.path)
+        try:
+            with self._lock:
+                self._ensure_schema(conn)
+            self._migrate_json(conn, account_name)
+            rows = conn.execute("SELECT quest_id FROM seen_quests WHERE account = ?", (account_name,))
+            return {quest_id for (quest_id,) in rows}
+        finally:
+            conn.close()
+
+    def _migrate_json(self, conn, account_name):
+        seen_file = f'uploads/{account_name}/seen_quests.json'
+        if not os.path.exists(seen_file):
+            return
+        try:
+            quest_ids = fast_json.load_file(seen_file)
+        except (OSError, ValueError) as e:
+            logging.error("[%s] Could not migrate %s: %s", account_name, seen_file, e)
+            return
+        now = time.time()
+        conn.execute("BEGIN")
+        conn.executemany(
+            "INSERT OR IGNORE INTO seen_quests (account, quest_id, seen_at) VALUES (?, ?, ?)",
+            [(account_name, quest_id, now) for quest_id in quest_ids],
+        )
+        conn.execute("COMMIT")
+        os.replace(seen_file, seen_file + ".migrated")
+        logging.info("[%s] Migrated %d seen quests from %s", account_name, len(quest_ids), seen_file)
+
+    def add(self, account_name, quest_id):
+        """Record a seen quest; persisted asynchronously."""
+        self._put(("add", account_name, quest_id, time.time()))
+
+    def discard(self, account_name, quest_id):
+        """Forget a seen quest (e.g. its claim failed) so it is tried again; persisted asynchronously."""
+        self._put(("discard", account_name, quest_id, None))
+
+    def _put(self, change):
+        with self._cond:
+            self._queued += 1
+            self._queue.put(change)
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="seen-writer", daemon=True)
+                    self._thread.start()
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been committed. Returns False on timeout."""
+        with self._cond:
+            target = self._queued
+            return self._cond.wait_for(lambda: self._committed >= target, timeout)
+
+    def _run(self):
+        conn = storage.connect(self.path)
+        with self._lock:
+            self._ensure_schema(conn)
+        batch = []
+        retry_delay = SEEN_RETRY_DELAY
+        while True:
+            if not batch:
+                batch.append(self._queue.get())
+            # Let a burst of claims accumulate into one commit
+            deadline = time.monotonic() + SEEN_FLUSH_INTERVAL
+            while len(batch) < SEEN_BATCH_SIZE:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            try:
+                conn.execute("BEGIN")
+                # Apply in order, one executemany per run of the same operation
+                for op, run in itertools.groupby(batch, key=lambda change: change[0]):
+                    if op == "add":
+                        conn.executemany(
+                            "INSERT OR IGNORE INTO seen_quests (account, quest_id, seen_at) VALUES (?, ?, ?)",
+                            [change[1:] for change in run],
+                        )
+                    else:
+                        conn.executemany(
+                            "DELETE FROM seen_quests WHERE account = ? AND quest_id = ?",
+                            [change[1:3] for change in run],
+                        )
+                conn.execute("COMMIT")
+            except Exception as e:
+                logging.exception("Error writing %d seen quests, retrying in %.1fs: %s", len(batch), retry_delay, e)
+                try:
+                    conn.execute("ROLLBACK")
+                except Exception:
+                    pass
+                time.sleep(retry_delay)
+                retry_delay = min(SEEN_RETRY_MAX, retry_delay * 2)
+                continue
+            retry_delay = SEEN_RETRY_DELAY
+            with self._cond:
+                self._committed += len(batch)
+                self._cond.notify_all()
+            batch = []
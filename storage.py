@@ -0,0 +1,23 @@
+import os
+import sqlite3
+
+# runtime knobs
+# Single SQLite database for bot state (seen quests, link mappings...)
+STATE_DB = os.getenv("STATE_DB", "uploads/state.db")
+
+
+def connect(path=STATE_DB):
+    """Open a SQLite connection tuned for many short concurrent transactions.
+
+    WAL lets readers proceed while a writer commits, and synchronous=NORMAL
+    only fsyncs at checkpoints, which is durable enough for bot state.
+    Connections must not be shared between threads.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    return conn
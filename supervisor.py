@@ -0,0 +1,272 @@
+import os
+import sys
+import time
+import signal
+import logging
+import threading
+import multiprocessing
+
+import requests
+from flask import Flask, Response, request
+
+import fast_json
+import metrics
+
+# runtime knobs
+# Worker i serves its web app on 127.0.0.1:WORKER_BASE_PORT+i
+WORKER_BASE_PORT = int(os.getenv("WORKER_BASE_PORT", "5100"))
+# Seconds to wait on a worker's /metrics or /health before reporting it down
+WORKER_SCRAPE_TIMEOUT = float(os.getenv("WORKER_SCRAPE_TIMEOUT", "2"))
+# Seconds to wait on a worker's upload route (it uploads the images to Zealy)
+WORKER_PROXY_TIMEOUT = float(os.getenv("WORKER_PROXY_TIMEOUT", "60"))
+
+UPLOAD_ROUTES = ("/upload", "/upload_reddit", "/upload_x", "/upload_batch")
+
+
+def shard_accounts(accounts, workers):
+    """Split accounts into at most ``workers`` near-equal shards.
+
+    Each community is polled once per process that watches it, so accounts
+    go to the open shard already watching most of their communities (ties:
+    the emptiest shard).
+    """
+    workers = max(1, min(workers, len(accounts)))
+    capacity = -(-len(accounts) // workers)
+    shards = [[] for _ in range(workers)]
+    watched = [set() for _ in range(workers)]
+    for account in sorted(accounts, key=lambda account: -len(account.get("communities") or ())):
+        communities = set(account.get("communities") or ())
+        open_shards = [i for i in range(workers) if len(shards[i]) < capacity]
+        best = max(open_shards, key=lambda i: (len(communities & watched[i]), -len(shards[i])))
+        shards[best].append(account)
+        watched[best] |= communities
+    return [shard for shard in shards if shard]
+
+
+def _exit_with_parent(parent_pid, interval=2):
+    # A supervisor killed outright can't stop its workers; don't outlive it
+    while os.getppid() == parent_pid:
+        time.sleep(interval)
+    os._exit(0)
+
+
+def _worker_main(accounts, port, parent_pid=None):
+    if parent_pid is not None:
+        threading.Thread(target=_exit_with_parent, args=(parent_pid,), name="parent-watch", daemon=True).start()
+    # Each worker builds its own sessions, stores and feeds. When the
+    # supervisor was started as `python main.py`, spawn has already loaded
+    # main.py in this child as __mp_main__; reuse it rather than import a second copy.
+    engine = sys.modules.get("__mp_main__")
+    if getattr(engine, "run_worker", None) is None:
+        import main as engine
+    engine.run_worker(accounts, port)
+
+
+class Worker:
+    """One worker process and the accounts it owns."""
+
+    def __init__(self, index, accounts, port):
+        self.index = index
+        self.accounts = accounts
+        self.port = port
+        self.url = f"http://127.0.0.1:{port}"
+        self.process = None
+        self.restarts = 0
+
+    def start(self):
+        # spawn, not fork: the supervisor already runs threads (Flask, SQLite writer)
+        context = multiprocessing.get_context("spawn")
+        self.process = context.Process(target=_worker_main, args=(self.accounts, self.port, os.getpid()), name=f"worker-{self.index}", daemon=True)
+        self.process.start()
+
+    def alive(self):
+        return self.process is not None and self.process.is_alive()
+
+    def stop(self, timeout=5):
+        if self.alive():
+            self.process.terminate()
+            self.process.join(timeout)
+
+
+class Supervisor:
+    """Shards accounts over worker processes and fronts them with one web app.
+
+    Every worker runs the normal engine for its accounts and the normal
+    Flask app on a local port; state is shared through the SQLite state DB
+    (link mappings, seen quests). The supervisor routes /upload* to the
+    worker owning the account, splits bulk imports by account, looks upload
+    jobs up on every worker and merges /metrics and /health from all.
+    """
+
+    def __init__(self, accounts, workers, base_port=WORKER_BASE_PORT):
+        self.workers = [Worker(i, shard, base_port + i) for i, shard in enumerate(shard_accounts(accounts, workers))]
+        self.owner = {account["name"]: worker for worker in self.workers for account in worker.accounts}
+        self.registry = metrics.Registry()
+        self.worker_up = self.registry.gauge("zealy_worker_up", "Whether a worker process is alive", ("worker",))
+        self.worker_restarts = self.registry.counter("zealy_worker_restarts_total", "Worker processes restarted after dying", ("worker",))
+        self.app = self._make_app()
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+            names = ", ".join(account["name"] for account in worker.accounts)
+            print(f"✅ Started worker {worker.index} (pid {worker.process.pid}) on port {worker.port}: {names}")
+
+    def watch(self, interval=5):
+        """Restart workers that died; blocks forever."""
+        while True:
+            time.sleep(interval)
+            for worker in self.workers:
+                if not worker.alive():
+                    logging.warning("Worker %d exited with %s, restarting", worker.index, worker.process.exitcode)
+                    print(f"⚠️  Warning: worker {worker.index} died, restarting")
+                    worker.restarts += 1
+                    self.worker_restarts.inc(worker=worker.index)
+                    worker.start()
+
+    def stop(self):
+        for worker in self.workers:
+            worker.stop()
+
+    def _scrape(self, worker, path):
+        try:
+            res = requests.get(worker.url + path, timeout=WORKER_SCRAPE_TIMEOUT)
+        except requests.RequestException as e:
+            return None, str(e)
+        if res.status_code != 200:
+            return None, f"HTTP {res.status_code}"
+        return res, None
+
+    def render_metrics(self):
+        expositions = []
+        for worker in self.workers:
+            self.worker_up.set(1 if worker.alive() else 0, worker=worker.index)
+            res, _ = self._scrape(worker, "/metrics")
+            if res is not None:
+                expositions.append(({"worker": str(worker.index)}, res.text))
+        return metrics.merge([({}, self.registry.render())] + expositions)
+
+    def health(self):
+        workers = []
+        for worker in self.workers:
+            entry = {
+                "worker": worker.index,
+                "pid": worker.process.pid if worker.process else None,
+                "alive": worker.alive(),
+                "restarts": worker.restarts,
+                "accounts": [account["name"] for account in worker.accounts],
+            }
+            res, error = self._scrape(worker, "/health")
+            if res is not None:
+                entry["health"] = fast_json.loads(res.content)
+            else:
+                entry["error"] = error
+            workers.append(entry)
+        healthy = all(entry["alive"] and "health" in entry for entry in workers)
+        return healthy, {"status": "ok" if healthy else "degraded", "workers": workers}
+
+    def proxy(self, worker):
+        """Forward the current request to a worker and relay its response."""
+        files = [(name, (f.filename, f.stream, f.mimetype)) for name, f in request.files.items(multi=True)]
+        try:
+            res = requests.request(
+                request.method, worker.url + request.path,
+                data=list(request.form.items(multi=True)), files=files or None, timeout=WORKER_PROXY_TIMEOUT,
+            )
+        except requests.RequestException as e:
+            return Response(f"Worker {worker.index} unavailable: {e}", status=503)
+        return Response(res.content, status=res.status_code, content_type=res.headers.get("Content-Type"))
+
+    def import_all(self):
+        """Send a bulk import to every worker, each limited to the accounts it owns.
+
+        Rows for accounts no worker runs are not imported. Returns
+        (status, body) with the workers' job ids.
+        """
+        requested = request.form.get("accounts")
+        requested = {name.strip() for name in requested.split(",")} if requested else None
+        form = [(key, value) for key, value in request.form.items(multi=True) if key != "accounts"]
+        files = [(name, (f.filename, f.read(), f.mimetype)) for name, f in request.files.items(multi=True)]
+        jobs = []
+        rejected = None
+        for worker in self.workers:
+            accounts = [account["name"] for account in worker.accounts if requested is None or account["name"] in requested]
+            if not accounts:
+                continue
+            try:
+                res = requests.post(worker.url + request.path, data=form + [("accounts", ",".join(accounts))], files=files, timeout=WORKER_PROXY_TIMEOUT)
+            except requests.RequestException as e:
+                jobs.append({"worker": worker.index, "error": str(e)})
+                continue
+            if res.status_code == 202:
+                jobs.append(dict(fast_json.loads(res.content), worker=worker.index))
+            elif res.status_code == 400:
+                rejected = res.text
+            else:
+                jobs.append({"worker": worker.index, "error": f"HTTP {res.status_code}: {res.text[:200]}"})
+        if not jobs:
+            return 400, {"error": rejected or "No rows to import"}
+        return 202, {"jobs": jobs}
+
+    def _make_app(self):
+        app = Flask(__name__)
+        supervisor = self
+
+        @app.route('/')
+        def index():
+            # Every worker serves the same upload page
+            return supervisor.proxy(supervisor.workers[0])
+
+        def upload():
+            account_name = request.form.get('account_name', '')
+            worker = supervisor.owner.get(account_name)
+            if worker is None:
+                return f'Session for account {account_name} not found. Please ensure the bot is running and monitoring this account.'
+            return supervisor.proxy(worker)
+
+        for route in UPLOAD_ROUTES:
+            app.add_url_rule(route, f"upload{route.replace('/', '_')}", upload, methods=['POST'])
+
+        @app.route('/import', methods=['POST'])
+        def import_mappings():
+            status, body = supervisor.import_all()
+            return Response(fast_json.dumps(body), status=status, mimetype="application/json")
+
+        @app.route('/upload/jobs/<job_id>')
+        def upload_job_status(job_id):
+            # Job ids don't say which worker took the upload; ask each
+            for worker in supervisor.workers:
+                res, _ = supervisor._scrape(worker, request.path)
+                if res is not None:
+                    return Response(res.content, content_type=res.headers.get("Content-Type"))
+            return Response(fast_json.dumps({"error": "unknown job"}), status=404, mimetype="application/json")
+
+        @app.route('/metrics')
+        def metrics_endpoint():
+            return Response(supervisor.render_metrics(), mimetype="text/plain; version=0.0.4")
+
+        @app.route('/health')
+        def health():
+            healthy, body = supervisor.health()
+            return Response(fast_json.dumps(body), status=200 if healthy else 503, mimetype="application/json")
+
+        return app
+
+
+def run(accounts, workers, host='0.0.0.0', port=5000):
+    """Start the workers and the fronting web app; blocks until interrupted."""
+    supervisor = Supervisor(accounts, workers)
+    print(f"🧩 Sharding {len(accounts)} account(s) over {len(supervisor.workers)} worker process(es)")
+    supervisor.start()
+    web = threading.Thread(target=lambda: supervisor.app.run(host=host, port=port, debug=False, use_reloader=False), daemon=True)
+    web.start()
+    print(f"✅ Started Flask web server on http://{host}:{port}")
+    print("🌐 Access the upload page at: http://YOUR_SERVER_IP:5000")
+    # SIGTERM (docker stop, systemd) shuts down like Ctrl+C, workers included
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    try:
+        supervisor.watch()
+    except KeyboardInterrupt:
+        print("\n🛑 Shutting down...")
+    finally:
+        supervisor.stop()
@@ -0,0 +1,184 @@
+import os
+import logging
+from abc import ABC, abstractmethod
+from collections import namedtuple
+
+from quest_features import quest_features
+
+# What to claim for one task: kind names the handler that built it ("tweetReact",
+# "instagram", "reddit", "x"); link is the matched quest link whose stored
+# mapping is removed after a claim.
+ClaimPlan = namedtuple("ClaimPlan", "kind task_id task_type file_urls link comment_url")
+
+# runtime knobs
+# Comma-separated handler kinds to run, e.g. "tweetReact" for a tweet-only bot (default: all)
+TASK_HANDLERS = os.getenv("TASK_HANDLERS", "")
+
+
+class TaskHandler(ABC):
+    """Claims one kind of task for one Zealy task ``type``.
+
+    ``features`` lists the QuestFeatures fields the handler reads. The
+    description walk only runs once a handler that declares some is
+    consulted, so tweetReact tasks (and any other type whose handlers need
+    none) never pay for it. ``template`` is the fixed part of the claim's
+    taskValues plus the (payload key, ClaimPlan field) that fills the
+    variable one, if any. ``cost`` is the claim's relative weight when
+    claims are prioritised (value per unit of cost goes first).
+    """
+
+    kind = None
+    task_type = None
+    features = ()
+    label = ""
+    template = ({}, None)
+    cost = 1.0
+
+    def applies(self, features):
+        """Cheap predicate: is this task this handler's kind of task at all?"""
+        return True
+
+    @abstractmethod
+    def match(self, account_name, quest_title, task, features):
+        """Return a ClaimPlan if this account can claim the task now, else None."""
+
+    def describe(self, plan):
+        """Short log description of what a plan submits."""
+        return plan.kind
+
+    def on_claimed(self, account_name, plan):
+        """Bookkeeping after a successful claim."""
+
+
+class TweetReactHandler(TaskHandler):
+    kind = "tweetReact"
+    task_type = "tweetReact"
+    template = ({"type": "tweetReact", "tweetUrl": ""}, None)
+
+    def match(self, account_name, quest_title, task, features):
+        return ClaimPlan(self.kind, task.get("id"), task.get("type"), None, None, None)
+
+
+class LinkMappingHandler(TaskHandler):
+    """A task whose quest links to a post the account uploaded proof for.
+
+    The quest is recognised by a QuestFeatures flag, its links come from
+    another field, and the first link with a stored mapping for the account
+    is claimed with the mapped value (file URLs or a comment URL).
+    """
+
+    def __init__(self, link_store, kind, task_type, flag, links_field, value_field, payload_key, platform_name, label="", cost=1.0):
+        self.link_store = link_store
+        self.kind = kind
+        self.task_type = task_type
+        self.flag = flag
+        self.links_field = links_field
+        self.value_field = value_field
+        self.features = (flag, links_field)
+        self.template = ({"type": task_type}, (payload_key, value_field))
+        self.platform_name = platform_name
+        self.label = label
+        self.cost = cost
+
+    def applies(self, features):
+        return getattr(features, self.flag)
+
+    def match(self, account_name, quest_title, task, features):
+        links = getattr(features, self.links_field)
+        logging.info("[%s] %s links found: %s", account_name, self.platform_name, links)
+        if not links:
+            logging.info("[%s] %s task but no %s links: %s", account_name, self.task_type, self.platform_name, quest_title)
+            return None
+        for link in links:
+            logging.debug("Checking %s match for %s and link %s", self.platform_name, account_name, link)
+            value = self.link_store.lookup(account_name, self.kind, link)
+            if value:
+                plan = ClaimPlan(self.kind, task.get("id"), task.get("type"), None, link, None)
+                return plan._replace(**{self.value_field: value})
+        logging.info("[%s] No match for %s links: %s", account_name, self.platform_name, links)
+        return None
+
+    def describe(self, plan):
+        if self.value_field == "file_urls":
+            return f"{plan.link} with URLs: {plan.file_urls}"
+        return f"{plan.link} with comment URL: {plan.comment_url}"
+
+    def on_claimed(self, account_name, plan):
+        """Drop the used link mapping so it isn't claimed twice."""
+        try:
+            removed = self.link_store.remove(account_name, self.kind, plan.link)
+        except Exception as e:
+            logging.error("[%s] Error removing %s link from store: %s", account_name, self.platform_name, e)
+            return
+        if removed:
+            logging.info("[%s] Removed claimed %s link from store: %s", account_name, self.platform_name, plan.link)
+        else:
+            logging.warning("[%s] %s link not found in store for removal: %s", account_name, self.platform_name, plan.link)
+
+
+def default_handlers(link_store):
+    """The built-in handlers, in the order they are tried for a task type."""
+    # File claims carry uploaded screenshots and take Zealy longer to accept
+    return [
+        TweetReactHandler(),
+        LinkMappingHandler(link_store, "instagram", "file", "is_instagram", "instagram_links", "file_urls", "fileUrls", "Instagram", cost=2.0),
+        LinkMappingHandler(link_store, "reddit", "file", "is_reddit", "reddit_links", "file_urls", "fileUrls", "Reddit", " Reddit task", cost=2.0),
+        LinkMappingHandler(link_store, "x", "url", "is_x_url", "x_links", "comment_url", "value", "X", " X task"),
+    ]
+
+
+def parse_enabled(value):
+    """Parse a TASK_HANDLERS value into a set of kinds, or None for all."""
+    kinds = {kind.strip() for kind in (value or "").split(",") if kind.strip()}
+    return kinds or None
+
+
+class HandlerRegistry:
+    """Task handlers indexed by task type.
+
+    For each task only the handlers registered for its ``type`` are
+    consulted, in registration order; the first whose predicate holds
+    decides the task. Adding a handler for a new type costs other types
+    nothing.
+    """
+
+    def __init__(self, handlers=(), enabled=None):
+        self.enabled = enabled
+        self._by_type = {}
+        self._by_kind = {}
+        for handler in handlers:
+            self.register(handler)
+
+    def register(self, handler):
+        """Add a handler (skipped if TASK_HANDLERS leaves its kind out)."""
+        if self.enabled is not None and handler.kind not in self.enabled:
+            return
+        if handler.kind in self._by_kind:
+            raise ValueError(f"A handler for {handler.kind!r} is already registered")
+        self._by_kind[handler.kind] = handler
+        self._by_type[handler.task_type] = self._by_type.get(handler.task_type, ()) + (handler,)
+
+    def kinds(self):
+        return list(self._by_kind)
+
+    def get(self, kind):
+        return self._by_kind.get(kind)
+
+    def for_type(self, task_type):
+        return self._by_type.get(task_type, ())
+
+    def match(self, account_name, quest_title, quest_data, task):
+        """Return the ClaimPlan for a task, or None if no handler claims it."""
+        handlers = self._by_type.get(task.get("type"))
+        if not handlers:
+            logging.info("[%s] No handler for %s task: %s", account_name, task.get("type"), quest_title)
+            return None
+        features = None
+        for handler in handlers:
+            if handler.features and features is None:
+                # One memoized description walk per quest, shared by every handler
+                features = quest_features(quest_data)
+            if handler.applies(features):
+                return handler.match(account_name, quest_title, task, features)
+        logging.info("[%s] No %s handler applies to: %s", account_name, task.get("type"), quest_title)
+        return None
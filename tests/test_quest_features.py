@@ -0,0 +1,104 @@
+import os
+import sys
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from benchmarks.fixtures import load_fixtures  # noqa: E402
+from quest_features import extract_features  # noqa: E402
+
+
+def old_extract_links(quest_data, domains, tweets=False):
+    """The recursive link walkers main.py used before quest_features."""
+    links = []
+
+    def extract_from_content(content_list):
+        for item in content_list:
+            item_type = item.get("type")
+            if tweets and item_type == "tweet":
+                src = item.get("attrs", {}).get("src", "")
+                if src and any(domain in src for domain in domains):
+                    links.append(src)
+            elif item_type == "paragraph":
+                for sub in item.get("content", []):
+                    for mark in sub.get("marks") or []:
+                        if mark.get("type") == "link":
+                            href = mark.get("attrs", {}).get("href", "")
+                            if any(domain in href for domain in domains):
+                                links.append(href)
+                    if sub.get("content"):
+                        extract_from_content(sub.get("content", []))
+            elif item_type in ["orderedList", "bulletList"]:
+                for list_item in item.get("content", []):
+                    if list_item.get("type") == "listItem":
+                        extract_from_content(list_item.get("content", []))
+            elif item.get("content"):
+                extract_from_content(item.get("content", []))
+
+    extract_from_content(quest_data.get("description", {}).get("content", []))
+    return links
+
+
+def old_links(quest_data):
+    return (
+        old_extract_links(quest_data, ("instagram.com",)),
+        old_extract_links(quest_data, ("reddit.com",)),
+        old_extract_links(quest_data, ("x.com", "twitter.com"), tweets=True),
+    )
+
+
+def new_links(quest_data):
+    features = extract_features(quest_data)
+    return list(features.instagram_links), list(features.reddit_links), list(features.x_links)
+
+
+def link(href):
+    return {"type": "text", "text": href, "marks": [{"type": "link", "attrs": {"href": href}}]}
+
+
+def paragraph(*content):
+    return {"type": "paragraph", "content": list(content)}
+
+
+def bullet_list(*items):
+    return {"type": "bulletList", "content": [{"type": "listItem", "content": list(item)} for item in items]}
+
+
+NESTED = {
+    "name": "Nested links",
+    "description": {"type": "doc", "content": [
+        paragraph(
+            dict(link("https://instagram.com/p/1"), content=[paragraph(link("https://instagram.com/p/2"))]),
+            link("https://instagram.com/p/3"),
+        ),
+        bullet_list(
+            [paragraph(link("https://reddit.com/r/a/1")),
+             bullet_list([paragraph(link("https://reddit.com/r/a/2"), link("https://x.com/a/status/1"))])],
+            [paragraph(link("https://reddit.com/r/a/3"))],
+        ),
+        {"type": "tweet", "attrs": {"src": "https://x.com/a/status/2", "tweetId": "2"}},
+        {"type": "blockquote", "content": [
+            paragraph(link("https://instagram.com/p/4"), link("https://x.com/a/status/3")),
+            bullet_list([paragraph(link("https://instagram.com/p/5"))]),
+        ]},
+        paragraph(link("https://instagram.com/p/6"), link("https://reddit.com/r/a/4")),
+    ]},
+}
+
+
+def test_links_match_old_walkers_on_fixtures():
+    for name, quest_data in load_fixtures().items():
+        assert new_links(quest_data) == old_links(quest_data), name
+
+
+def test_nested_links_come_out_in_document_order():
+    assert new_links(NESTED) == old_links(NESTED)
+    assert new_links(NESTED)[0] == [f"https://instagram.com/p/{n}" for n in range(1, 7)]
+    assert extract_features(NESTED).tweet_ids == ("2", "1", "3")
+
+
+def test_deep_nesting_does_not_recurse():
+    quest_data = {"description": {"content": [paragraph(link("https://reddit.com/r/a/deep"))]}}
+    for _ in range(5000):
+        quest_data["description"]["content"] = [{"type": "blockquote", "content": quest_data["description"]["content"]}]
+    assert extract_features(quest_data).reddit_links == ("https://reddit.com/r/a/deep",)
@@ -0,0 +1,94 @@
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+import threading
+
+
+class TimerHeap:
+    """Callbacks due at time.monotonic() deadlines, run in order by one thread.
+
+    Each key has at most one pending timer: scheduling a key again replaces
+    it (or, with ``earliest=True``, only moves it earlier). Cancelled and
+    replaced entries stay in the heap and are skipped when they come up.
+    Callbacks run on the timer thread and should only hand work off.
+    """
+
+    def __init__(self, name="timers"):
+        self.name = name
+        self._heap = []  # (due, seq, key, callback)
+        self._pending = {}  # key -> (due, seq)
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def __len__(self):
+        with self._cond:
+            return len(self._pending)
+
+    def schedule(self, key, due, callback, earliest=False):
+        """Run callback at monotonic time ``due``; returns False if an earlier timer was kept."""
+        with self._cond:
+            current = self._pending.get(key)
+            if earliest and current is not None and current[0] <= due:
+                return False
+            seq = next(self._seq)
+            self._pending[key] = (due, seq)
+            heapq.heappush(self._heap, (due, seq, key, callback))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return True
+
+    def cancel(self, key):
+        with self._cond:
+            self._pending.pop(key, None)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._cond.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, seq, key, callback = heapq.heappop(self._heap)
+                current = self._pending.get(key)
+                if current is None or current[1] != seq:
+                    continue
+                del self._pending[key]
+            try:
+                callback()
+            except Exception as e:
+                logging.exception("Timer %r failed: %s", key, e)
+
+
+class AsyncTimers:
+    """TimerHeap counterpart for the running event loop (its scheduler is already a heap)."""
+
+    def __init__(self):
+        self._pending = {}  # key -> (due, asyncio.TimerHandle)
+
+    def __len__(self):
+        return len(self._pending)
+
+    def schedule(self, key, due, callback, earliest=False):
+        current = self._pending.get(key)
+        if current is not None:
+            if earliest and current[0] <= due:
+                return False
+            current[1].cancel()
+        handle = asyncio.get_running_loop().call_later(max(0.0, due - time.monotonic()), self._fire, key, callback)
+        self._pending[key] = (due, handle)
+        return True
+
+    def cancel(self, key):
+        current = self._pending.pop(key, None)
+        if current is not None:
+            current[1].cancel()
+
+    def _fire(self, key, callback):
+        self._pending.pop(key, None)
+        try:
+            callback()
+        except Exception as e:
+            logging.exception("Timer %r failed: %s", key, e)
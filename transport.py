@@ -0,0 +1,155 @@
+import os
+import logging
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from communities import ZEALY_API
+
+try:
+    import httpx
+except ImportError:  # only needed for HTTP2=1
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (httpx's HTTP/2 support)
+except ImportError:
+    h2 = None
+
+# runtime knobs
+# Connection pool size per purpose, per account (the poll pool also carries a feed's parallel detail fetches)
+POLL_POOL_SIZE = int(os.getenv("POLL_POOL_SIZE", os.getenv("DETAIL_WORKERS", "8")))
+CLAIM_POOL_SIZE = int(os.getenv("CLAIM_POOL_SIZE", os.getenv("MAX_WORKERS", "10")))
+UPLOAD_POOL_SIZE = int(os.getenv("UPLOAD_POOL_SIZE", os.getenv("UPLOAD_WORKERS", "8")))
+# Keep-alive connections opened per pool at startup and again after a connection error
+WARMUP_CONNECTIONS = int(os.getenv("WARMUP_CONNECTIONS", "1"))
+WARMUP_URL = os.getenv("WARMUP_URL", f"{ZEALY_API}/")
+WARMUP_TIMEOUT = float(os.getenv("WARMUP_TIMEOUT", "5"))
+# Multiplex all of an account's requests over one HTTP/2 connection (pip install "httpx[http2]")
+HTTP2 = os.getenv("HTTP2", "0") == "1"
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+class PooledSession(requests.Session):
+    """requests.Session with an explicitly sized connection pool that can be pre-warmed."""
+
+    def __init__(self, pool_size, warmup_url=WARMUP_URL):
+        super().__init__()
+        self.pool_size = max(1, pool_size)
+        self.warmup_url = warmup_url
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def prepare_post(self, url, body, headers=None):
+        """Build a ready-to-send JSON POST (session headers and cookies already merged)."""
+        return self.prepare_request(requests.Request("POST", url, data=body, headers=dict(JSON_HEADERS, **(headers or {}))))
+
+    def send_prepared(self, prepared, timeout=10):
+        return self.send(prepared, timeout=timeout)
+
+    def _touch(self):
+        try:
+            self.head(self.warmup_url, timeout=WARMUP_TIMEOUT)
+        except requests.RequestException as e:
+            logging.debug("Warm-up of %s failed: %s", self.warmup_url, e)
+
+    def warm_up(self, connections=WARMUP_CONNECTIONS):
+        """Open up to ``connections`` keep-alive connections (TCP + TLS) before they are needed."""
+        count = min(max(0, connections), self.pool_size)
+        # Concurrent requests each take their own connection out of the pool
+        threads = [threading.Thread(target=self._touch, daemon=True) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+
+class Http2Session:
+    """requests-style get/post over one multiplexed httpx HTTP/2 client."""
+
+    def __init__(self, warmup_url=WARMUP_URL):
+        limits = httpx.Limits(max_connections=max(POLL_POOL_SIZE, CLAIM_POOL_SIZE, UPLOAD_POOL_SIZE))
+        self.client = httpx.Client(http2=True, limits=limits, timeout=10)
+        self.headers = self.client.headers
+        self.warmup_url = warmup_url
+
+    def get(self, url, **kwargs):
+        return self.client.get(url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.client.post(url, **kwargs)
+
+    def prepare_post(self, url, body, headers=None):
+        """Build a ready-to-send JSON POST on the shared client."""
+        return self.client.build_request("POST", url, content=body, headers=dict(JSON_HEADERS, **(headers or {})))
+
+    def send_prepared(self, prepared, timeout=10):
+        # httpx takes the timeout from the request rather than from send()
+        prepared.extensions["timeout"] = httpx.Timeout(timeout).as_dict()
+        return self.client.send(prepared)
+
+    def warm_up(self, connections=WARMUP_CONNECTIONS):
+        """Open the connection; every later request is a new stream on it."""
+        if connections <= 0:
+            return
+        try:
+            self.client.head(self.warmup_url, timeout=WARMUP_TIMEOUT)
+        except httpx.HTTPError as e:
+            logging.debug("Warm-up of %s failed: %s", self.warmup_url, e)
+
+    def close(self):
+        self.client.close()
+
+
+def http2_available():
+    return httpx is not None and h2 is not None
+
+
+class AccountTransport:
+    """One account's HTTP sessions, split by purpose.
+
+    Polling, claiming and uploading each get their own pool (POLL_POOL_SIZE,
+    CLAIM_POOL_SIZE, UPLOAD_POOL_SIZE) so a burst of claims never waits
+    behind a slow upload or the poll loop. With HTTP2=1 all three share one
+    HTTP/2 connection instead.
+    """
+
+    def __init__(self, headers, http2=HTTP2):
+        if http2 and not http2_available():
+            logging.warning('HTTP2=1 needs httpx with HTTP/2 support (pip install "httpx[http2]"), using HTTP/1.1 pools')
+            http2 = False
+        self.http2 = http2
+        if http2:
+            self.poll = self.claim = self.upload = Http2Session()
+        else:
+            self.poll = PooledSession(POLL_POOL_SIZE)
+            self.claim = PooledSession(CLAIM_POOL_SIZE)
+            self.upload = PooledSession(UPLOAD_POOL_SIZE)
+        for session in self.sessions():
+            session.headers.update(headers)
+
+    def sessions(self):
+        """Distinct sessions of this transport."""
+        return list({id(session): session for session in (self.poll, self.claim, self.upload)}.values())
+
+    def warm_up(self):
+        """Warm every pool in parallel."""
+        threads = [threading.Thread(target=session.warm_up, daemon=True) for session in self.sessions()]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def close(self):
+        for session in self.sessions():
+            session.close()
+
+
+def rewarm(session):
+    """Re-open keep-alive connections in the background after a connection error."""
+    warm_up = getattr(session, "warm_up", None)
+    if warm_up is not None:
+        threading.Thread(target=warm_up, daemon=True).start()
@@ -0,0 +1,96 @@
+import os
+import time
+import hashlib
+import threading
+
+import storage
+
+# runtime knobs
+# File URLs remembered per account (least recently used go first) and for how long (seconds)
+UPLOAD_CACHE_SIZE = int(os.getenv("UPLOAD_CACHE_SIZE", "2000"))
+UPLOAD_CACHE_TTL = float(os.getenv("UPLOAD_CACHE_TTL", str(30 * 24 * 3600)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS upload_cache (
+    account TEXT NOT NULL,
+    sha256 TEXT NOT NULL,
+    url TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    used_at REAL NOT NULL,
+    PRIMARY KEY (account, sha256)
+) WITHOUT ROWID
+"""
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class UploadCache:
+    """Zealy file URLs by SHA-256 of the uploaded bytes, per account, in SQLite.
+
+    A screenshot posted again (for another link, or a form re-submitted
+    after an error) resolves to the URL it got the first time without
+    touching the network. Entries older than ``ttl`` are ignored and each
+    account keeps its ``max_entries`` most recently used.
+    """
+
+    def __init__(self, path=storage.STATE_DB, max_entries=UPLOAD_CACHE_SIZE, ttl=UPLOAD_CACHE_TTL):
+        self.path = path
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+        self.hits = 0
+        self.misses = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = storage.connect(self.path)
+            with self._lock:
+                if not self._schema_ready:
+                    conn.execute(SCHEMA)
+                    self._schema_ready = True
+            self._local.conn = conn
+        return conn
+
+    def get(self, account_name, digest):
+        """Return the cached file URL for some content, or None."""
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT url, created_at FROM upload_cache WHERE account = ? AND sha256 = ?",
+            (account_name, digest),
+        ).fetchone()
+        if row is None or (self.ttl and now - row[1] > self.ttl):
+            self.misses += 1
+            return None
+        conn.execute("UPDATE upload_cache SET used_at = ? WHERE account = ? AND sha256 = ?", (now, account_name, digest))
+        self.hits += 1
+        return row[0]
+
+    def put(self, account_name, digest, url, size=0):
+        """Remember the URL a file got, evicting the account's least recently used entries."""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO upload_cache (account, sha256, url, size, created_at, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (account_name, digest, url, size, now, now),
+            )
+            conn.execute(
+                "DELETE FROM upload_cache WHERE account = ? AND sha256 NOT IN "
+                "(SELECT sha256 FROM upload_cache WHERE account = ? ORDER BY used_at DESC LIMIT ?)",
+                (account_name, account_name, self.max_entries),
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def __len__(self):
+        return self._conn().execute("SELECT COUNT(*) FROM upload_cache").fetchone()[0]
@@ -0,0 +1,229 @@
+import os
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import fast_json
+import metrics
+from upload_cache import content_hash
+
+# runtime knobs
+# Files sent to Zealy's /files at once, across every account and job
+UPLOAD_WORKERS = int(os.getenv("UPLOAD_WORKERS", "8"))
+UPLOAD_TIMEOUT = float(os.getenv("UPLOAD_TIMEOUT", "60"))
+# Finished jobs stay queryable this many seconds, and at most UPLOAD_JOBS_KEPT of them
+UPLOAD_JOB_TTL = float(os.getenv("UPLOAD_JOB_TTL", "3600"))
+UPLOAD_JOBS_KEPT = int(os.getenv("UPLOAD_JOBS_KEPT", "1000"))
+
+# A file to upload, read into memory while its request is still open
+UploadFile = namedtuple("UploadFile", "filename data mimetype")
+# A link mapping to store once all its files are uploaded. The stored value
+# is the list of file URLs, or ``value`` for an item without files (X
+# comment URLs); ``row`` is its manifest row for bulk imports.
+UploadItem = namedtuple("UploadItem", "account platform link files value row", defaults=(None, None))
+
+
+class UploadError(Exception):
+    """Zealy's files endpoint refused an upload."""
+
+
+def upload_file(session, files_url, upload):
+    """POST one file to Zealy; returns its file URL."""
+    started = time.monotonic()
+    response = session.post(files_url, files={"file": (upload.filename, upload.data, upload.mimetype)}, timeout=UPLOAD_TIMEOUT)
+    metrics.UPLOAD_SECONDS.observe(time.monotonic() - started)
+    if response.status_code != 200:
+        raise UploadError(f"HTTP {response.status_code}: {response.text[:200]}")
+    return fast_json.loads(response.content)["url"]
+
+
+class UploadJob:
+    """Progress and outcome of one upload submission (one or more link mappings)."""
+
+    def __init__(self, job_id, items):
+        self.id = job_id
+        self.items = items
+        self.state = "running"
+        self.created_at = time.time()
+        self.finished_at = None
+        self.files_total = sum(len(item.files) for item in items)
+        self.files_done = 0
+        self.files_failed = 0
+        self.files_cached = 0
+        self.urls = [[None] * len(item.files) for item in items]
+        self.cached = [[False] * len(item.files) for item in items]
+        self.errors = [None] * len(items)
+        self.stored = [False] * len(items)
+        self._lock = threading.Lock()
+
+    def file_finished(self, targets, url, error, cached=False):
+        """Record the result of one file content posted at (index, position) targets.
+
+        Only the first target was uploaded, unless ``cached``; the others
+        reuse its URL. Returns True once every file of the job is in.
+        """
+        with self._lock:
+            for n, (index, position) in enumerate(targets):
+                if error is None:
+                    reused = cached or n > 0
+                    self.urls[index][position] = url
+                    self.cached[index][position] = reused
+                    self.files_done += 1
+                    self.files_cached += reused
+                else:
+                    self.files_failed += 1
+                    if self.errors[index] is None:
+                        self.errors[index] = str(error)
+            return self.files_done + self.files_failed == self.files_total
+
+    def fail_item(self, index, error):
+        with self._lock:
+            self.errors[index] = error
+
+    def finished(self):
+        return self.finished_at is not None
+
+    def to_dict(self):
+        with self._lock:
+            items = []
+            for item, urls, cached, error, stored in zip(self.items, self.urls, self.cached, self.errors, self.stored):
+                status = "stored" if stored else "failed" if error else "pending"
+                entry = {
+                    "account": item.account, "platform": item.platform, "link": item.link,
+                    "status": status, "urls": urls, "cached": cached, "error": error,
+                }
+                if item.row is not None:
+                    entry["row"] = item.row
+                items.append(entry)
+            return {
+                "id": self.id,
+                "state": self.state,
+                "files_total": self.files_total,
+                "files_done": self.files_done,
+                "files_failed": self.files_failed,
+                "files_cached": self.files_cached,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+                "items": items,
+            }
+
+
+class UploadJobs:
+    """Runs upload submissions in the background.
+
+    Every file of a job goes to a shared pool of UPLOAD_WORKERS threads, so
+    a job takes as long as its slowest file and the web request that
+    submitted it returns at once. Content already in the UploadCache, or
+    posted more than once in the job, is uploaded at most once. When the
+    job's last file is in, the mappings whose files all uploaded are
+    written in one transaction per account. Jobs are kept in memory for
+    get().
+    """
+
+    def __init__(self, link_store, session_for, files_url, cache=None, workers=UPLOAD_WORKERS):
+        self.link_store = link_store
+        self.session_for = session_for
+        self.files_url = files_url
+        self.cache = cache
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="upload")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, items, errors=None):
+        """Start uploading items' files; returns the UploadJob.
+
+        ``errors`` maps the index of items rejected up front to the reason;
+        they are reported with the job but not uploaded or stored.
+        """
+        job = UploadJob(uuid.uuid4().hex, list(items))
+        for index, error in (errors or {}).items():
+            job.fail_item(index, error)
+            job.files_total -= len(job.items[index].files)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        metrics.UPLOAD_JOBS.inc(state="submitted")
+        # (account, sha256) -> [session, upload, targets]: identical content uploads once
+        contents = OrderedDict()
+        for index, item in enumerate(job.items):
+            if job.errors[index] is not None or not item.files:
+                continue
+            session = self.session_for(item.account)
+            if session is None:
+                job.fail_item(index, f"Session for account {item.account} not found")
+                job.files_total -= len(item.files)
+                continue
+            for position, upload in enumerate(item.files):
+                content = contents.setdefault((item.account, content_hash(upload.data)), [session, upload, []])
+                content[2].append((index, position))
+        done = not contents
+        pending = []
+        for (account_name, digest), (session, upload, targets) in contents.items():
+            url = self.cache.get(account_name, digest) if self.cache is not None else None
+            if url is None:
+                pending.append((account_name, digest, session, upload, targets))
+                continue
+            logging.info("[%s] Reusing upload of %s -> %s", account_name, upload.filename, url)
+            metrics.UPLOAD_FILES.inc(len(targets), result="cached")
+            done = job.file_finished(targets, url, None, cached=True)
+        for args in pending:
+            self._pool.submit(self._upload, job, *args)
+        if done:
+            self._finish(job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _prune(self):
+        """Forget finished jobs past UPLOAD_JOB_TTL or beyond UPLOAD_JOBS_KEPT. Caller holds the lock."""
+        now = time.time()
+        for job_id, job in list(self._jobs.items()):
+            if not job.finished():
+                continue
+            if len(self._jobs) > UPLOAD_JOBS_KEPT or now - job.finished_at > UPLOAD_JOB_TTL:
+                del self._jobs[job_id]
+
+    def _upload(self, job, account_name, digest, session, upload, targets):
+        url = error = None
+        try:
+            url = upload_file(session, self.files_url, upload)
+            logging.info("[%s] Uploaded %s -> %s", account_name, upload.filename, url)
+            if self.cache is not None:
+                self.cache.put(account_name, digest, url, len(upload.data))
+        except Exception as e:
+            error = e
+            logging.error("[%s] Failed to upload %s: %s", account_name, upload.filename, e)
+        metrics.UPLOAD_FILES.inc(result="ok" if error is None else "failed")
+        metrics.UPLOAD_FILES.inc(len(targets) - 1, result="cached")
+        if job.file_finished(targets, url, error):
+            self._finish(job)
+
+    def _finish(self, job):
+        groups = OrderedDict()
+        for index, item in enumerate(job.items):
+            if job.errors[index] is None:
+                groups.setdefault(item.account, []).append(index)
+        for account_name, indexes in groups.items():
+            entries = []
+            for i in indexes:
+                item = job.items[i]
+                entries.append((item.platform, item.link, job.urls[i] if item.files else item.value))
+            try:
+                self.link_store.put_batch(account_name, entries)
+            except Exception as e:
+                logging.exception("[%s] Error storing links: %s", account_name, e)
+                for i in indexes:
+                    job.fail_item(i, f"Could not store mapping: {e}")
+                continue
+            for i in indexes:
+                job.stored[i] = True
+            logging.info("[%s] Stored %d link mapping(s) from upload job %s", account_name, len(indexes), job.id)
+        stored = sum(job.stored)
+        job.state = "done" if stored == len(job.items) else "failed" if not stored else "partial"
+        job.finished_at = time.time()
+        metrics.UPLOAD_JOBS.inc(state=job.state)